@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CPU players.
+
+By default, plays a few random openings to get a set of middlegame-ish
+positions, then times the single-process hard search against the Lazy-SMP
+search with more workers, both to a fixed depth and under a fixed time budget.
+
+With --mcts-games, plays whole HyperChess games of the MCTS AI against
+the hard AI instead, alternating colours, and reports MCTS playouts per
+second, wins/draws/losses and boards won.
+
+Usage: python benchmark_ai.py [--workers 1 2 4] [--depth 4] [--time 1.0] [--positions 6]
+       python benchmark_ai.py --mcts-games 10 [--time 0.5] [--max-plies 300]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.chess_board import ChessBoard
+from src.chess_ai import ChessAI
+from src.mcts_ai import MCTSAI
+from src.pieces import Color
+from src.ultimate_chess_board import UltimateChessBoard
+from src.board_tensor import material
+
+
+def make_positions(count: int, plies: int = 10, seed: int = 1):
+    """Boards with black to move after plies random moves"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = ChessBoard()
+        color = Color.WHITE
+        for _ in range(plies + 1):
+            moves = board.generate_legal_moves(color)
+            if board.is_won or not moves:
+                break
+            board.make_move(rng.choice(moves))
+            color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        else:
+            if color == Color.BLACK and board.generate_legal_moves(color):
+                positions.append(board.copy())
+    return positions
+
+
+def run(positions, workers: int, depth: int, time_limit: float):
+    """Return (seconds to depth, depth reached in time_limit, nodes searched in time_limit), summed over positions"""
+    fixed_depth = ChessAI(Color.BLACK, "hard", time_limit=1e9, max_depth=depth, workers=workers,
+                          use_opening_book=False)
+    timed = ChessAI(Color.BLACK, "hard", time_limit=time_limit, workers=workers, use_opening_book=False)
+    # start the worker processes before timing anything
+    fixed_depth.get_move(positions[0].copy())
+    timed.get_move(positions[0].copy())
+
+    total_time = 0.0
+    total_depth = 0
+    total_nodes = 0
+    for board in positions:
+        fixed_depth.new_game()
+        start = time.perf_counter()
+        fixed_depth.get_move(board.copy())
+        total_time += time.perf_counter() - start
+
+        timed.new_game()
+        timed.get_move(board.copy())
+        total_depth += timed.last_search_depth
+        total_nodes += timed.last_search_nodes
+    fixed_depth.close()
+    timed.close()
+    return total_time, total_depth, total_nodes
+
+
+def play_mcts_vs_hard(games: int, time_limit: float, max_plies: int, seed: int = 1):
+    """
+    Play games of MCTS against hard, MCTS taking white in even-numbered
+    games and black in odd ones. Legal play never leaves a king en prise,
+    so boards are not won in practice and a game normally ends when the
+    side to move is checkmated on the current board: that side loses.
+    Stalemate is a draw. A game that hits max_plies goes to whoever has
+    won more boards, then to whoever is ahead in material over all 64
+    boards. Prints one line per game and returns (results, boards won
+    per player, playouts per second).
+    """
+    results = {"mcts": 0, "hard": 0, "draw": 0}
+    boards_won = {"mcts": 0, "hard": 0}
+    playouts = 0
+    mcts_seconds = 0.0
+    for index in range(games):
+        # _determine_next_board picks a random free board when the target is won
+        random.seed(seed + index)
+        mcts_color = Color.WHITE if index % 2 == 0 else Color.BLACK
+        hard_color = Color.BLACK if mcts_color == Color.WHITE else Color.WHITE
+        players = {mcts_color: "mcts", hard_color: "hard"}
+        game = UltimateChessBoard()
+        hard = ChessAI(hard_color, "hard", time_limit)
+        mcts = MCTSAI(mcts_color, time_limit=time_limit, position_cache=game.position_cache, seed=seed + index)
+        plies = 0
+        ending = f"move cap ({max_plies} plies)"
+        while plies < max_plies and not game.game_over:
+            if game.current_player == hard_color:
+                move = hard.get_move(game.get_current_board())
+            else:
+                start = time.perf_counter()
+                move = mcts.get_move(game)
+                mcts_seconds += time.perf_counter() - start
+                playouts += mcts.last_playouts
+            if move is None:
+                board = game.get_current_board()
+                ending = "checkmate" if board.is_in_check(game.current_player) else "stalemate"
+                break
+            if not game.make_move(*move):
+                ending = "illegal move"
+                break
+            plies += 1
+        hard.close()
+
+        won = {players[color]: sum(row.count(color) for row in game.won_boards) for color in players}
+        balance = int(material(game.tensor).sum())
+        if hard_color == Color.WHITE:
+            balance = -balance
+        if game.game_over:
+            winner = players[game.winner] if game.winner is not None else "draw"
+            ending = "game won"
+        elif ending == "checkmate":
+            winner = "hard" if game.current_player == mcts_color else "mcts"
+        elif ending == "stalemate":
+            winner = "draw"
+        elif won["mcts"] != won["hard"]:
+            winner = "mcts" if won["mcts"] > won["hard"] else "hard"
+        elif balance:
+            winner = "mcts" if balance > 0 else "hard"
+        else:
+            winner = "draw"
+        results[winner] += 1
+        for player in boards_won:
+            boards_won[player] += won[player]
+        print(f"game {index + 1}: mcts {mcts_color.value:>5}  {winner:>5}  {ending} after {plies} plies  "
+              f"boards won mcts {won['mcts']} / hard {won['hard']}  material {balance:+d} for mcts", flush=True)
+    return results, boards_won, playouts / max(mcts_seconds, 1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hard AI search")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--depth", type=int, default=4, help="depth for the time-to-depth test")
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per move for the fixed-time test")
+    parser.add_argument("--positions", type=int, default=6)
+    parser.add_argument("--mcts-games", type=int, default=0, help="play this many MCTS vs hard games instead")
+    parser.add_argument("--max-plies", type=int, default=300, help="move cap per MCTS vs hard game")
+    args = parser.parse_args()
+
+    if args.mcts_games:
+        results, boards_won, rate = play_mcts_vs_hard(args.mcts_games, args.time, args.max_plies)
+        print(f"MCTS {results['mcts']} wins, {results['draw']} draws, {results['hard']} losses against hard; "
+              f"boards won mcts {boards_won['mcts']} / hard {boards_won['hard']}; {rate:.0f} playouts/s")
+        return
+
+    positions = make_positions(args.positions)
+    print(f"{len(positions)} positions, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'time to d' + str(args.depth):>12} {'speedup':>8} {'avg depth':>10} {'nodes/s':>10}")
+    baseline = None
+    for workers in args.workers:
+        seconds, depth, nodes = run(positions, workers, args.depth, args.time)
+        if baseline is None:
+            baseline = seconds
+        print(f"{workers:>7} {seconds:>11.2f}s {baseline / seconds:>7.2f}x "
+              f"{depth / len(positions):>10.1f} {nodes / (args.time * len(positions)):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
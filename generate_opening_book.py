@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Generate the opening book the hard AI consults before searching.
+
+Every board of a game starts from the standard position and its moves
+alternate white, black, so the same early positions come up on board
+after board. This walks the tree from the start position: every white
+move is followed, and at each black-to-move position the hard search is
+run with a generous budget and its answer becomes the book move, which
+is also the only reply followed further. The CPU always plays black, so
+only black-to-move positions are stored.
+
+Usage: python generate_opening_book.py [--plies 4] [--time 20.0] [--depth 7] [--output assets/opening_book.bin]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.chess_board import ChessBoard
+from src.chess_ai import ChessAI
+from src.opening_book import DEFAULT_BOOK_PATH, OpeningBook, write_opening_book
+from src.pieces import Color
+
+
+def build_book(plies: int, time_limit: float, max_depth: int):
+    """Return {position key: move} for the black-to-move positions within plies of the start"""
+    ai = ChessAI(Color.BLACK, "hard", time_limit=time_limit, max_depth=max_depth, use_opening_book=False)
+    entries = {}
+    started = time.perf_counter()
+
+    def visit(board: ChessBoard, color: Color, ply: int):
+        if ply >= plies or board.is_won:
+            return
+        if color == Color.WHITE:
+            for move in board.generate_legal_moves(Color.WHITE):
+                undo = board.make_move(move)
+                visit(board, Color.BLACK, ply + 1)
+                board.unmake_move(undo)
+            return
+
+        key = board.position_key(Color.BLACK)
+        move = entries.get(key)
+        if move is None:
+            move = ai.get_move(board)
+            if move is None:
+                return
+            entries[key] = move
+            print(f"{len(entries):5d} positions  depth {ai.last_search_depth:2d}  "
+                  f"{time.perf_counter() - started:7.1f}s", end="\r", flush=True)
+        undo = board.make_move(move)
+        visit(board, Color.WHITE, ply + 1)
+        board.unmake_move(undo)
+
+    visit(ChessBoard(), Color.WHITE, 0)
+    print()
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the opening book")
+    parser.add_argument("--plies", type=int, default=4, help="how many plies from the start position to cover")
+    parser.add_argument("--time", type=float, default=20.0, help="seconds of search per position")
+    parser.add_argument("--depth", type=int, default=7, help="maximum search depth per position")
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args()
+
+    entries = build_book(args.plies, args.time, args.depth)
+    write_opening_book(args.output, entries)
+    print(f"wrote {len(OpeningBook(args.output))} positions to {args.output} "
+          f"({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Move and attack lookup tables, built once at import.
+
+Every table is indexed by square (row * 8 + col, see src.bitboard). Target
+tables hold (row, col) tuples in a fixed order for move generation, mask
+tables hold the same squares as a bitboard for attack tests.
+"""
+from typing import List, Tuple
+
+Square = Tuple[int, int]
+
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0),
+                (1, 1), (1, -1), (-1, 1), (-1, -1)]
+ROOK_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+# every sliding direction; ROOK_DIRECTIONS first so index < 4 means orthogonal
+DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+# pawn tables are indexed [color_index][square], white = 0 moving up the board, black = 1
+PAWN_DIRECTION = (-1, 1)
+PAWN_START_ROW = (6, 1)
+
+
+def _leaper_targets(offsets: List[Square]) -> List[Tuple[Square, ...]]:
+    table = []
+    for square in range(64):
+        row, col = square >> 3, square & 7
+        table.append(tuple((row + dr, col + dc) for dr, dc in offsets
+                           if 0 <= row + dr < 8 and 0 <= col + dc < 8))
+    return table
+
+
+def _ray_targets(dr: int, dc: int) -> List[Tuple[Square, ...]]:
+    table = []
+    for square in range(64):
+        row, col = square >> 3, square & 7
+        ray = []
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            ray.append((r, c))
+            r += dr
+            c += dc
+        table.append(tuple(ray))
+    return table
+
+
+def _to_mask(targets: Tuple[Square, ...]) -> int:
+    mask = 0
+    for r, c in targets:
+        mask |= 1 << (r * 8 + c)
+    return mask
+
+
+KNIGHT_TARGETS = _leaper_targets(KNIGHT_OFFSETS)
+KING_TARGETS = _leaper_targets(KING_OFFSETS)
+KNIGHT_ATTACKS = [_to_mask(targets) for targets in KNIGHT_TARGETS]
+KING_ATTACKS = [_to_mask(targets) for targets in KING_TARGETS]
+
+# RAYS[direction][square] walks outward from the square to the edge of the board
+RAYS = [_ray_targets(dr, dc) for dr, dc in DIRECTIONS]
+RAY_MASKS = [[_to_mask(ray) for ray in rays] for rays in RAYS]
+# rays that run towards higher square indices meet their nearest blocker at the lowest set bit
+RAY_ASCENDING = [dr * 8 + dc > 0 for dr, dc in DIRECTIONS]
+ROOK_RAYS = RAYS[:4]
+BISHOP_RAYS = RAYS[4:]
+
+PAWN_ATTACK_TARGETS = [
+    _leaper_targets([(PAWN_DIRECTION[color_index], -1), (PAWN_DIRECTION[color_index], 1)])
+    for color_index in (0, 1)
+]
+PAWN_ATTACKS = [[_to_mask(targets) for targets in table] for table in PAWN_ATTACK_TARGETS]
+
+
+def _pawn_pushes(color_index: int) -> List[Tuple[Square, ...]]:
+    direction = PAWN_DIRECTION[color_index]
+    table = []
+    for square in range(64):
+        row, col = square >> 3, square & 7
+        pushes = []
+        if 0 <= row + direction < 8:
+            pushes.append((row + direction, col))
+            if row == PAWN_START_ROW[color_index] and 0 <= row + 2 * direction < 8:
+                pushes.append((row + 2 * direction, col))
+        table.append(tuple(pushes))
+    return table
+
+
+# single push first, then the double push from the start row
+PAWN_PUSHES = [_pawn_pushes(color_index) for color_index in (0, 1)]
@@ -0,0 +1,33 @@
+from typing import Iterator, Tuple
+
+# squares are numbered row * 8 + col, so a8 (row 0, col 0) is bit 0 and h1 is bit 63
+FULL_BOARD = (1 << 64) - 1
+
+
+def square_index(row: int, col: int) -> int:
+    return row * 8 + col
+
+
+def square_coords(square: int) -> Tuple[int, int]:
+    return square >> 3, square & 7
+
+
+def square_bit(row: int, col: int) -> int:
+    return 1 << (row * 8 + col)
+
+
+def popcount(bb: int) -> int:
+    return bin(bb).count("1")
+
+
+def lsb_index(bb: int) -> int:
+    """Index of the lowest set bit, or -1 for an empty bitboard"""
+    return (bb & -bb).bit_length() - 1
+
+
+def iter_squares(bb: int) -> Iterator[int]:
+    """Yield the index of every set bit, lowest first"""
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
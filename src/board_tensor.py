@@ -0,0 +1,97 @@
+"""
+NumPy view of every board of a game, for evaluating all 64 at once.
+
+UltimateChessBoard keeps an int8 array of shape (8, 8, 8, 8) indexed
+[board_row, board_col, row, col] in step with its boards. Each square holds
+a signed piece code: 0 for empty, type_code + 1 for a white piece and
+-(type_code + 1) for a black one, so a king is +6 or -6.
+
+The functions below reduce the whole array in one call and return one
+number per board, shape (8, 8), from white's point of view unless noted.
+"""
+from typing import List, Optional
+import numpy as np
+from src.pieces import Piece, WHITE, BLACK, PAWN, ROOK, KNIGHT, BISHOP, QUEEN, KING
+from src.evaluation import TYPE_VALUES
+from src.attack_tables import KING_TARGETS, KNIGHT_TARGETS, PAWN_PUSHES, BISHOP_RAYS, ROOK_RAYS
+
+TENSOR_SHAPE = (8, 8, 8, 8)
+# lookup tables are indexed by signed code + CODE_OFFSET, i.e. 0..12
+CODE_OFFSET = 6
+
+
+def tensor_code(piece: Optional[Piece]) -> int:
+    """Signed code of a piece as stored in the tensor"""
+    if piece is None:
+        return 0
+    return piece.type_code + 1 if piece.color_code == WHITE else -(piece.type_code + 1)
+
+
+def board_codes(board) -> List[List[int]]:
+    """8x8 signed codes of one ChessBoard, ready to assign into a tensor slice"""
+    return [[tensor_code(piece) for piece in row] for row in board.board]
+
+
+def build_tensor(boards) -> np.ndarray:
+    """Tensor for an 8x8 grid of ChessBoards"""
+    return np.array([[board_codes(board) for board in row] for row in boards], dtype=np.int8)
+
+
+def _reach(type_code: int, color_code: int, square: int) -> int:
+    """Squares the piece would reach from square on an empty board"""
+    if type_code == PAWN:
+        return len(PAWN_PUSHES[color_code][square])
+    if type_code == KNIGHT:
+        return len(KNIGHT_TARGETS[square])
+    if type_code == KING:
+        return len(KING_TARGETS[square])
+    rays = []
+    if type_code in (ROOK, QUEEN):
+        rays += ROOK_RAYS
+    if type_code in (BISHOP, QUEEN):
+        rays += BISHOP_RAYS
+    return sum(len(table[square]) for table in rays)
+
+
+def _signed_table(value) -> np.ndarray:
+    """(13, 64) table over signed codes: value(type_code, color_code, square), negated for black"""
+    table = np.zeros((2 * CODE_OFFSET + 1, 64), dtype=np.int32)
+    for type_code in range(6):
+        for square in range(64):
+            table[CODE_OFFSET + type_code + 1, square] = value(type_code, WHITE, square)
+            table[CODE_OFFSET - type_code - 1, square] = -value(type_code, BLACK, square)
+    return table
+
+
+# empty-board reach by signed code and square; a cheap stand-in for counting moves
+MOBILITY_TABLE = _signed_table(_reach)
+_SQUARES = np.arange(64)
+
+
+def material(tensor: np.ndarray) -> np.ndarray:
+    """Material balance of every board in centipawns, read from TYPE_VALUES at call time"""
+    values = np.zeros(2 * CODE_OFFSET + 1, dtype=np.int32)
+    values[CODE_OFFSET + 1:] = TYPE_VALUES
+    values[:CODE_OFFSET] = [-value for value in reversed(TYPE_VALUES)]
+    return values[tensor.astype(np.intp) + CODE_OFFSET].sum(axis=(2, 3))
+
+
+def mobility(tensor: np.ndarray) -> np.ndarray:
+    """
+    Mobility proxy of every board: white's total empty-board reach minus
+    black's. Blockers are ignored, so it rewards centralised, developed
+    pieces rather than counting legal moves.
+    """
+    codes = tensor.reshape(8, 8, 64).astype(np.intp) + CODE_OFFSET
+    return MOBILITY_TABLE[codes, _SQUARES].sum(axis=2)
+
+
+def king_presence(tensor: np.ndarray) -> np.ndarray:
+    """Bool array of shape (8, 8, 2): whether each board still has its white and black king"""
+    return np.stack([(tensor == KING + 1).any(axis=(2, 3)),
+                     (tensor == -(KING + 1)).any(axis=(2, 3))], axis=2)
+
+
+def live_boards(tensor: np.ndarray) -> np.ndarray:
+    """(8, 8) bool: boards where both kings are still on, i.e. not yet won"""
+    return king_presence(tensor).all(axis=2)
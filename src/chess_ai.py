@@ -1,13 +1,90 @@
 import random
+import threading
+import time
 from typing import List, Tuple, Optional
-from src.pieces import Color, PieceType
+from src.pieces import Color, PieceType, PIECE_TYPES, COLOR_CODES, PAWN
 from src.chess_board import ChessBoard
+from src.evaluation import TYPE_VALUES
+from src.transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from src.opening_book import OpeningBook
+
+# score for winning the board (capturing or mating the king), well above any evaluation in centipawns
+WIN_SCORE = 100000
+# anything beyond this is a win or loss some number of plies away
+WIN_THRESHOLD = WIN_SCORE - 1000
+
+# how many nodes to search between clock checks
+BUDGET_CHECK_INTERVAL = 256
+
+# move ordering tiers: TT move, then captures (MVV-LVA), then killers, then quiet moves by history
+TT_MOVE_ORDER = 10_000_000
+CAPTURE_ORDER = 1_000_000
+KILLER_ORDER = 900_000
+# history scores are halved once any of them reaches this, so quiet moves stay below the killers
+HISTORY_LIMIT = 100_000
+
+# medium mode's bonus for landing near the centre, by square
+CENTER_SCORES = [(7 - (abs((square >> 3) - 3.5) + abs((square & 7) - 3.5))) * 0.5 for square in range(64)]
+
+# one book for every AI, read from disk the first time it is needed
+_OPENING_BOOK = OpeningBook()
+
+# quiescence search skips captures that can't lift the score to alpha even with this much to spare
+DELTA_MARGIN = 200
+
+class _SearchTimeout(Exception):
+    """Raised inside the search once the time or node budget is spent"""
+
+def _score_to_tt(score: int, ply: int) -> int:
+    """Store win/loss scores relative to the node, not the root"""
+    if score >= WIN_THRESHOLD:
+        return score + ply
+    if score <= -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score >= WIN_THRESHOLD:
+        return score - ply
+    if score <= -WIN_THRESHOLD:
+        return score + ply
+    return score
 
 class ChessAI:
-    def __init__(self, color: Color, difficulty: str = "medium"):
+    # difficulties that search until their time budget runs out
+    TIMED_DIFFICULTIES = ("hard",)
+    # whether get_move and ponder take the whole UltimateChessBoard rather than one ChessBoard
+    searches_game = False
+    
+    def __init__(self, color: Color, difficulty: str = "medium", time_limit: float = 2.0,
+                 node_limit: Optional[int] = None, max_depth: int = 32, tt_size_mb: float = 16, workers: int = 1,
+                 use_opening_book: bool = True):
         self.color = color
         self.difficulty = difficulty
+        # hard mode searches in this many processes at once (Lazy SMP) when above 1
+        self.workers = workers
+        self._parallel = None
+        
+        # search budget for hard mode: wall-clock seconds and, optionally, nodes
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self._deadline = 0.0
+        self._nodes = 0
+        self._root_depth = 0
+        # set from another thread to abandon the current search
+        self._stop_event: Optional[threading.Event] = None
+        # depth reached by the last completed iteration, for the UI / benchmarks
+        self.last_search_depth = 0
+        self.last_search_nodes = 0
         
+        # transposition table, kept for the whole game and allocated on first use
+        self.tt_size_mb = tt_size_mb
+        self._tt: Optional[TranspositionTable] = None
+        # (position key, move) found by ponder(), used once by the next matching search
+        self._ponder_result: Optional[Tuple[int, Tuple[int, int, int, int]]] = None
+        # consulted before searching in the timed difficulties
+        self.opening_book: Optional[OpeningBook] = _OPENING_BOOK if use_opening_book else None
 
         self.piece_values = {
             PieceType.PAWN: 1,
@@ -17,14 +94,71 @@ class ChessAI:
             PieceType.QUEEN: 9,
             PieceType.KING: 100
         }
+        
+        # move ordering state for hard mode: two killer moves per ply and a
+        # history score per (side, from square, to square)
+        self._killers: List[List[Optional[Tuple[int, int, int, int]]]] = []
+        self._history: List[List[int]] = [[0] * 4096, [0] * 4096]
+        # piece_values indexed by type code, refreshed at the start of each search
+        self._type_values: List[int] = []
     
-    def get_move(self, board: ChessBoard) -> Optional[Tuple[int, int, int, int]]:
-
-        valid_moves = board.get_valid_moves_for_color(self.color)
+    @property
+    def transposition_table(self) -> TranspositionTable:
+        if self._tt is None:
+            if self.workers > 1:
+                # shared with the worker processes
+                self._tt = self._parallel_search().transposition_table
+            else:
+                self._tt = TranspositionTable(self.tt_size_mb)
+        return self._tt
+    
+    def _parallel_search(self):
+        if self._parallel is None:
+            from src.parallel_search import ParallelSearch
+            self._parallel = ParallelSearch(self.color, self.workers, self.tt_size_mb, self.max_depth)
+            self._tt = self._parallel.transposition_table
+        return self._parallel
+    
+    def close(self):
+        """Shut down the worker processes of a parallel search, if any were started"""
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+            self._tt = None
+    
+    def new_game(self):
+        """Forget everything learned in the previous game"""
+        if self._tt is not None:
+            self._tt.clear()
+        self._ponder_result = None
+    
+    @property
+    def is_timed(self) -> bool:
+        """Whether get_move spends the whole time budget searching"""
+        return self.difficulty in self.TIMED_DIFFICULTIES
+    
+    def get_move(self, board: ChessBoard, stop_event: Optional[threading.Event] = None) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Pick a move for this AI's colour. A search running on a worker thread
+        can be cut short by setting stop_event; the move it returns is then
+        not worth playing.
+        """
+        self._stop_event = stop_event
+        # taking the king wins the board, nothing else is worth generating or searching
+        king_captures = board.king_captures(self.color)
+        if king_captures:
+            return king_captures[0]
+        
+        valid_moves = board.generate_legal_moves(self.color)
         
         if not valid_moves:
             return None
         
+        if self.is_timed and self.opening_book is not None:
+            book_move = self.opening_book.probe(board.position_key(self.color))
+            if book_move in valid_moves:
+                return book_move
+        
         if self.difficulty == "easy":
             return self._get_random_move(valid_moves)
         elif self.difficulty == "medium":
@@ -37,34 +171,31 @@ class ChessAI:
         return random.choice(valid_moves)
     
     def _get_medium_move(self, board: ChessBoard, valid_moves: List[Tuple[int, int, int, int]]) -> Tuple[int, int, int, int]:
-
+        """
+        Score every move with the quick heuristics (capture value, centre
+        squares, pawn advances, landing on a square one of our own pieces can
+        move to) and pick one of the best at random. The move-target map is
+        built once for the position, so each move costs a handful of lookups.
+        """
+        squares = board.board
+        reachable = board.move_target_map(self.color)
+        capture_scores = [self.piece_values[piece_type] * 10 for piece_type in PIECE_TYPES]
+        forward = 1 if self.color == Color.BLACK else -1
+        
         best_moves = []
         best_score = float('-inf')
         
         for move in valid_moves:
             from_row, from_col, to_row, to_col = move
-            piece = board.get_piece(from_row, from_col)
-            target_piece = board.get_piece(to_row, to_col)
+            target_piece = squares[to_row][to_col]
             
             score = 0
-            
-
             if target_piece:
-                score += self.piece_values.get(target_piece.piece_type, 0) * 10
-            
-
-            center_distance = abs(to_row - 3.5) + abs(to_col - 3.5)
-            score += (7 - center_distance) * 0.5
-            
-
-            if piece and piece.piece_type == PieceType.PAWN:
-                if self.color == Color.WHITE and to_row < from_row:
-                    score += 1
-                elif self.color == Color.BLACK and to_row > from_row:
-                    score += 1
-            
-
-            if self._is_square_attacked(board, to_row, to_col, self.color):
+                score += capture_scores[target_piece.type_code]
+            score += CENTER_SCORES[to_row * 8 + to_col]
+            if squares[from_row][from_col].type_code == PAWN and (to_row - from_row) * forward > 0:
+                score += 1
+            if reachable >> (to_row * 8 + to_col) & 1:
                 score -= 5
             
             if score > best_score:
@@ -77,126 +208,334 @@ class ChessAI:
     
     def _get_hard_move(self, board: ChessBoard, valid_moves: List[Tuple[int, int, int, int]]) -> Tuple[int, int, int, int]:
 
+        # answered already while the opponent was thinking
+        if self._ponder_result is not None:
+            ponder_key, ponder_move = self._ponder_result
+            self._ponder_result = None
+            if ponder_key == board.position_key(self.color) and ponder_move in valid_moves:
+                return ponder_move
+        
+        if self.workers > 1:
+            move, self.last_search_depth, self.last_search_nodes = self._parallel_search().search(
+                board, valid_moves, self.time_limit, self.node_limit, self._stop_event)
+            return move
+        
+        self._start_search()
+        return self._iterative_deepening(board, valid_moves)
+    
+    def ponder(self, board: ChessBoard, stop_event: Optional[threading.Event] = None) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Search on the opponent's time. board has the opponent to move: guess
+        their reply, then search ours to it with the normal budget. The
+        transposition table keeps what was learned either way; if the search
+        ran to the end without stop_event being set, the move is also kept
+        and get_move returns it straight away when that position comes up.
+        Returns the predicted opponent move, or None if there was nothing to ponder.
+        """
+        if board.is_won:
+            return None
+        opponent_color = Color.BLACK if self.color == Color.WHITE else Color.WHITE
+        opponent_moves = board.generate_legal_moves(opponent_color)
+        if not opponent_moves:
+            return None
+        
+        self._stop_event = stop_event
+        self._start_search()
+        # the best reply found by our last search, or failing that the most promising-looking move
+        entry = self._tt.probe(board.position_key(opponent_color))
+        predicted = self._order_moves(board, opponent_moves, 0, entry[3] if entry else None,
+                                      COLOR_CODES[opponent_color])[0]
+        
+        undo = board.make_move(predicted)
+        try:
+            valid_moves = board.generate_legal_moves(self.color)
+            if board.is_won or not valid_moves:
+                return predicted
+            move = self._iterative_deepening(board, valid_moves)
+            if stop_event is None or not stop_event.is_set():
+                self._ponder_result = (board.position_key(self.color), move)
+        finally:
+            board.unmake_move(undo)
+        return predicted
+    
+    def _iterative_deepening(self, board: ChessBoard, valid_moves: List[Tuple[int, int, int, int]],
+                             first_depth: int = 1) -> Tuple[int, int, int, int]:
+        """
+        Iterative deepening: search depth 1, 2, 3, ... until the time or node
+        budget runs out and play the best move of the last completed depth.
+        Parallel helpers may skip the shallowest depths with first_depth.
+        """
+        tt = self._tt
+        root_key = board.position_key(self.color)
+        
         best_move = None
+        entry = tt.probe(root_key)
+        root_moves = self._order_moves(board, list(valid_moves), 0, entry[3] if entry else None, COLOR_CODES[self.color])
+        for depth in range(first_depth, self.max_depth + 1):
+            self._root_depth = depth
+            try:
+                score, move = self._search_root(board, root_moves, depth)
+            except _SearchTimeout:
+                break
+            
+            best_move = move
+            self.last_search_depth = depth
+            tt.store(root_key, depth, EXACT, score, move)
+            # the previous best move goes first, so a cut-short iteration still sees it
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= WIN_THRESHOLD:
+                break  # forced win or loss found, deeper search won't change it
+        
+        self.last_search_nodes = self._nodes
+        return best_move if best_move else random.choice(valid_moves)
+    
+    def _start_search(self):
+        """Reset the budget and per-search state before a new hard-mode search"""
+        self._deadline = time.perf_counter() + self.time_limit
+        self._nodes = 0
+        self._root_depth = 0
+        self.last_search_depth = 0
+        self.transposition_table.new_search()
+        self._killers = [[None, None] for _ in range(self.max_depth + 1)]
+        self._age_history()
+        self._type_values = [self.piece_values[piece_type] for piece_type in PIECE_TYPES]
+    
+    def _search_root(self, board: ChessBoard, root_moves: List[Tuple[int, int, int, int]], depth: int) -> Tuple[float, Tuple[int, int, int, int]]:
+
+        best_move = root_moves[0]
         best_score = float('-inf')
+        alpha = float('-inf')
         
-        for move in valid_moves:
-            # make move
-            from_row, from_col, to_row, to_col = move
-            original_piece = board.get_piece(to_row, to_col)
-            moving_piece = board.get_piece(from_row, from_col)
-            
-            board.set_piece(from_row, from_col, None)
-            board.set_piece(to_row, to_col, moving_piece)
-            if moving_piece:
-                moving_piece.move_to(to_row, to_col)
-            
-            # eval position
-            score = self._minimax(board, 2, False, float('-inf'), float('inf'))
-            
-            # undo
-            board.set_piece(from_row, from_col, moving_piece)
-            board.set_piece(to_row, to_col, original_piece)
-            if moving_piece:
-                moving_piece.move_to(from_row, from_col)
+        for move in root_moves:
+            undo = board.make_move(move)
+            try:
+                score = self._minimax(board, depth - 1, False, alpha, float('inf'), 1)
+            finally:
+                board.unmake_move(undo)
             
             if score > best_score:
                 best_score = score
                 best_move = move
+            alpha = max(alpha, score)
         
-        return best_move if best_move else random.choice(valid_moves)
+        return best_score, best_move
+    
+    def _order_moves(self, board: ChessBoard, moves: List[Tuple[int, int, int, int]], ply: int,
+                     tt_move: Optional[Tuple[int, int, int, int]], side_code: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Sort moves best-first: the TT move, captures by most valuable victim /
+        least valuable attacker, this ply's killer moves, then quiet moves by
+        history score.
+        """
+        squares = board.board
+        values = self._type_values
+        killers = self._killers[ply] if ply < len(self._killers) else (None, None)
+        history = self._history[side_code]
+        
+        def order_key(move):
+            if move == tt_move:
+                return TT_MOVE_ORDER
+            from_row, from_col, to_row, to_col = move
+            victim = squares[to_row][to_col]
+            if victim is not None:
+                attacker = squares[from_row][from_col]
+                return CAPTURE_ORDER + values[victim.type_code] * 1000 - values[attacker.type_code]
+            if move == killers[0]:
+                return KILLER_ORDER + 1
+            if move == killers[1]:
+                return KILLER_ORDER
+            return history[(from_row * 8 + from_col) * 64 + to_row * 8 + to_col]
+        
+        moves.sort(key=order_key, reverse=True)
+        return moves
+    
+    def _record_cutoff(self, board: ChessBoard, move: Tuple[int, int, int, int], depth: int, ply: int, side_code: int):
+        """Remember a quiet move that caused a beta cutoff as a killer and in the history table"""
+        from_row, from_col, to_row, to_col = move
+        if board.board[to_row][to_col] is not None:
+            return  # captures are already ordered first
+        if ply < len(self._killers):
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        history = self._history[side_code]
+        index = (from_row * 8 + from_col) * 64 + to_row * 8 + to_col
+        history[index] += depth * depth
+        if history[index] >= HISTORY_LIMIT:
+            self._age_history()
+    
+    def _age_history(self):
+        """Halve every history score so older cutoffs count for less"""
+        for side_history in self._history:
+            for index in range(4096):
+                side_history[index] >>= 1
     
-    def _minimax(self, board: ChessBoard, depth: int, maximizing: bool, alpha: float, beta: float) -> float:
+    def _check_budget(self):
+        if self._stop_event is not None and self._stop_event.is_set():
+            raise _SearchTimeout()
+        # the first iteration always completes so there is a move to play
+        if self._root_depth <= 1:
+            return
+        if self.node_limit is not None and self._nodes >= self.node_limit:
+            raise _SearchTimeout()
+        if time.perf_counter() >= self._deadline:
+            raise _SearchTimeout()
+    
+    def _minimax(self, board: ChessBoard, depth: int, maximizing: bool, alpha: float, beta: float, ply: int = 0) -> float:
 
         if depth == 0:
-            return self._evaluate_position(board)
+            return self._quiescence(board, maximizing, alpha, beta, ply)
+        
+        self._nodes += 1
+        if self._nodes % BUDGET_CHECK_INTERVAL == 0:
+            self._check_budget()
+        
+        # a captured king ends the board, nothing after it matters
+        if board.is_won:
+            # prefer quicker wins and slower losses
+            return WIN_SCORE - ply if board.winner == self.color else ply - WIN_SCORE
         
+        opponent_color = Color.BLACK if self.color == Color.WHITE else Color.WHITE
+        side_to_move = self.color if maximizing else opponent_color
+        if board.king_captures(side_to_move):
+            return WIN_SCORE - (ply + 1) if maximizing else (ply + 1) - WIN_SCORE
+        
+        tt = self._tt
+        key = board.position_key(side_to_move)
+        entry = tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, bound, entry_score, tt_move = entry
+            if entry_depth >= depth:
+                entry_score = _score_from_tt(entry_score, ply)
+                if bound == EXACT:
+                    return entry_score
+                if bound == LOWER_BOUND and entry_score >= beta:
+                    return entry_score
+                if bound == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score
+        
+        valid_moves = board.generate_legal_moves(side_to_move)
+        if not valid_moves:
+            if board.is_in_check(side_to_move):
+                return ply - WIN_SCORE if maximizing else WIN_SCORE - ply
+            return 0  # stalemate
+        side_code = COLOR_CODES[side_to_move]
+        valid_moves = self._order_moves(board, valid_moves, ply, tt_move, side_code)
+        
+        alpha_orig, beta_orig = alpha, beta
+        best_move = None
         if maximizing:
-            max_eval = float('-inf')
-            valid_moves = board.get_valid_moves_for_color(self.color)
+            best_eval = float('-inf')
             
             for move in valid_moves:
-                from_row, from_col, to_row, to_col = move
-                original_piece = board.get_piece(to_row, to_col)
-                moving_piece = board.get_piece(from_row, from_col)
+                undo = board.make_move(move)
+                try:
+                    eval_score = self._minimax(board, depth - 1, False, alpha, beta, ply + 1)
+                finally:
+                    board.unmake_move(undo)
                 
-                # move
-                board.set_piece(from_row, from_col, None)
-                board.set_piece(to_row, to_col, moving_piece)
-                if moving_piece:
-                    moving_piece.move_to(to_row, to_col)
-                
-                eval_score = self._minimax(board, depth - 1, False, alpha, beta)
-                
-                # undo move
-                board.set_piece(from_row, from_col, moving_piece)
-                board.set_piece(to_row, to_col, original_piece)
-                if moving_piece:
-                    moving_piece.move_to(from_row, from_col)
-                
-                max_eval = max(max_eval, eval_score)
+                if eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = move
                 alpha = max(alpha, eval_score)
                 
                 if beta <= alpha:
+                    self._record_cutoff(board, move, depth, ply, side_code)
                     break
-            
-            return max_eval
         else:
-            min_eval = float('inf')
-            opponent_color = Color.BLACK if self.color == Color.WHITE else Color.WHITE
-            valid_moves = board.get_valid_moves_for_color(opponent_color)
+            best_eval = float('inf')
             
             for move in valid_moves:
-                from_row, from_col, to_row, to_col = move
-                original_piece = board.get_piece(to_row, to_col)
-                moving_piece = board.get_piece(from_row, from_col)
-                
-                # move
-                board.set_piece(from_row, from_col, None)
-                board.set_piece(to_row, to_col, moving_piece)
-                if moving_piece:
-                    moving_piece.move_to(to_row, to_col)
-                
-                eval_score = self._minimax(board, depth - 1, True, alpha, beta)
+                undo = board.make_move(move)
+                try:
+                    eval_score = self._minimax(board, depth - 1, True, alpha, beta, ply + 1)
+                finally:
+                    board.unmake_move(undo)
                 
-                # uundo move
-                board.set_piece(from_row, from_col, moving_piece)
-                board.set_piece(to_row, to_col, original_piece)
-                if moving_piece:
-                    moving_piece.move_to(from_row, from_col)
-                
-                min_eval = min(min_eval, eval_score)
+                if eval_score < best_eval:
+                    best_eval = eval_score
+                    best_move = move
                 beta = min(beta, eval_score)
                 
                 if beta <= alpha:
+                    self._record_cutoff(board, move, depth, ply, side_code)
                     break
+        
+        if best_eval <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_eval >= beta_orig:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        tt.store(key, depth, bound, _score_to_tt(best_eval, ply), best_move)
+        return best_eval
+    
+    def _quiescence(self, board: ChessBoard, maximizing: bool, alpha: float, beta: float, ply: int) -> float:
+        """
+        Resolve pending captures at the leaves so the static evaluation is
+        never taken mid-exchange. The side to move may stand pat on the
+        static score; captures that can't reach alpha (or beta) even with
+        DELTA_MARGIN to spare are skipped.
+        """
+        self._nodes += 1
+        if self._nodes % BUDGET_CHECK_INTERVAL == 0:
+            self._check_budget()
+        
+        if board.is_won:
+            return WIN_SCORE - ply if board.winner == self.color else ply - WIN_SCORE
+        
+        opponent_color = Color.BLACK if self.color == Color.WHITE else Color.WHITE
+        side_to_move = self.color if maximizing else opponent_color
+        # taking the king wins the board outright, no need to look any further
+        if board.king_captures(side_to_move):
+            return WIN_SCORE - (ply + 1) if maximizing else (ply + 1) - WIN_SCORE
+        
+        stand_pat = self._evaluate_position(board)
+        if maximizing:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+        
+        captures = board.generate_legal_moves(side_to_move, captures_only=True)
+        if not captures:
+            return stand_pat
+        
+        squares = board.board
+        captures = self._order_moves(board, captures, ply, None, COLOR_CODES[side_to_move])
+        best_eval = stand_pat
+        for move in captures:
+            gain = TYPE_VALUES[squares[move[2]][move[3]].type_code] + DELTA_MARGIN
+            if maximizing:
+                if stand_pat + gain <= alpha:
+                    continue
+            elif stand_pat - gain >= beta:
+                continue
+            
+            undo = board.make_move(move)
+            try:
+                eval_score = self._quiescence(board, not maximizing, alpha, beta, ply + 1)
+            finally:
+                board.unmake_move(undo)
             
-            return min_eval
+            if maximizing:
+                best_eval = max(best_eval, eval_score)
+                alpha = max(alpha, eval_score)
+            else:
+                best_eval = min(best_eval, eval_score)
+                beta = min(beta, eval_score)
+            if beta <= alpha:
+                break
+        
+        return best_eval
     
     def _evaluate_position(self, board: ChessBoard) -> float:
+        """Material and piece-square score in centipawns, kept up to date by the board itself"""
+        return board.evaluation if self.color == Color.WHITE else -board.evaluation
 
-        score = 0
-        
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece(row, col)
-                if piece:
-                    piece_value = self.piece_values.get(piece.piece_type, 0)
-                    
-                    if piece.color == self.color:
-                        score += piece_value
-                    else:
-                        score -= piece_value
-        
-        return score
-    
-    def _is_square_attacked(self, board: ChessBoard, row: int, col: int, by_color: Color) -> bool:
-
-        for r in range(8):
-            for c in range(8):
-                piece = board.get_piece(r, c)
-                if piece and piece.color == by_color:
-                    valid_moves = piece.get_valid_moves(board)
-                    if (row, col) in valid_moves:
-                        return True
-        return False
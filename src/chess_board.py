@@ -1,13 +1,67 @@
 import pygame
-from typing import List, Tuple, Optional, Dict
-from src.pieces import Piece, PieceType, Color
+import threading
+from typing import List, Tuple, Optional, Dict, NamedTuple
+from src.pieces import (
+    Piece, PieceType, Color, COLOR_CODES, TYPE_CODES, WHITE, BLACK, PAWN, ROOK, KNIGHT, BISHOP, QUEEN, KING,
+)
+from src.bitboard import FULL_BOARD, iter_squares
+from src.zobrist import PIECE_KEYS, SIDE_KEY
+from src.evaluation import SQUARE_VALUES
+from src.attack_tables import KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, PAWN_PUSHES, RAY_ASCENDING, RAY_MASKS
+
+# bitboard slot for every (piece type, colour) pair, the same as Piece.code:
+# white pieces 0-5, black pieces 6-11
+PIECE_INDEX: Dict[Tuple[PieceType, Color], int] = {
+    (piece_type, color): COLOR_CODES[color] * 6 + TYPE_CODES[piece_type]
+    for color in Color
+    for piece_type in PieceType
+}
+
+Move = Tuple[int, int, int, int]
+
+# guards _Sharing counts, which the UI thread and the AI worker thread both
+# touch; re-entrant because __del__ can run while the lock is held
+_SHARING_LOCK = threading.RLock()
+
+class _Sharing:
+    """How many boards are using one set of squares, pieces and bitboards"""
+    __slots__ = ("boards",)
+    
+    def __init__(self):
+        self.boards = 1
+
+class UndoToken(NamedTuple):
+    """Everything make_move changed that set_piece cannot put back on its own"""
+    move: Move
+    piece: Piece
+    captured: Optional[Piece]
+    had_moved: bool
+    winner: Optional[Color]
+    is_won: bool
 
 class ChessBoard:
     def __init__(self):
         self.board: List[List[Optional[Piece]]] = [[None for _ in range(8)] for _ in range(8)]
         self.winner: Optional[Color] = None
         self.is_won = False
+        # bitboard core, kept in sync with self.board by set_piece
+        self.bitboards: List[int] = [0] * 12
+        # per-colour occupancy, indexed by colour code
+        self.occupancy: List[int] = [0, 0]
+        self.occupied = 0
+        # king squares by colour code, maintained by set_piece; None once the king has been captured
+        self.king_squares: List[Optional[Tuple[int, int]]] = [None, None]
+        self._undo_stack: List[UndoToken] = []
+        # True while the square list, pieces and bitboards are shared with a copy()
+        self._shared = False
+        # use count of the shared storage, None while it is private
+        self._sharing: Optional[_Sharing] = None
+        # Zobrist key of the piece placement, updated by set_piece
+        self.zobrist_key = 0
+        # material plus piece-square score in centipawns from white's point of view, updated by set_piece
+        self.evaluation = 0
         self._setup_initial_pieces()
+        self._rebuild_bitboards()
     
     def _setup_initial_pieces(self):
         """Set up the initial chess pieces"""
@@ -43,6 +97,34 @@ class ChessBoard:
         for col in range(8):
             self.board[6][col] = Piece(PieceType.PAWN, Color.WHITE, 6, col)
     
+    def _rebuild_bitboards(self):
+        """Recompute every bitboard from the square list"""
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.king_squares = [None, None]
+        self.zobrist_key = 0
+        self.evaluation = 0
+        for row in range(8):
+            for col in range(8):
+                piece = self.board[row][col]
+                if piece:
+                    bit = 1 << (row * 8 + col)
+                    self.bitboards[piece.code] |= bit
+                    self.zobrist_key ^= PIECE_KEYS[piece.code][row * 8 + col]
+                    self.evaluation += SQUARE_VALUES[piece.code][row * 8 + col]
+                    self.occupancy[piece.color_code] |= bit
+                    if piece.type_code == KING:
+                        self.king_squares[piece.color_code] = (row, col)
+        self.occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+    
+    def position_key(self, color_to_move: Color) -> int:
+        """Zobrist key of the placement plus the side to move"""
+        return self.zobrist_key ^ SIDE_KEY if color_to_move == Color.BLACK else self.zobrist_key
+    
+    def get_bitboard(self, piece_type: PieceType, color: Color) -> int:
+
+        return self.bitboards[PIECE_INDEX[(piece_type, color)]]
+    
     def get_piece(self, row: int, col: int) -> Optional[Piece]:
 
         if 0 <= row < 8 and 0 <= col < 8:
@@ -52,105 +134,370 @@ class ChessBoard:
     def set_piece(self, row: int, col: int, piece: Optional[Piece]):
 
         if 0 <= row < 8 and 0 <= col < 8:
+            if self._shared:
+                self._unshare()
+            square = row * 8 + col
+            bit = 1 << square
+            old_piece = self.board[row][col]
+            if old_piece:
+                self.bitboards[old_piece.code] &= ~bit
+                self.zobrist_key ^= PIECE_KEYS[old_piece.code][square]
+                self.evaluation -= SQUARE_VALUES[old_piece.code][square]
+                self.occupancy[old_piece.color_code] &= ~bit
+                self.occupied &= ~bit
+                # the same king may briefly sit on two squares during make/undo,
+                # so only forget it if this is the square we are tracking
+                if old_piece.type_code == KING and self.king_squares[old_piece.color_code] == (row, col):
+                    self.king_squares[old_piece.color_code] = None
             self.board[row][col] = piece
             if piece:
                 piece.row = row
                 piece.col = col
+                self.bitboards[piece.code] |= bit
+                self.zobrist_key ^= PIECE_KEYS[piece.code][square]
+                self.evaluation += SQUARE_VALUES[piece.code][square]
+                self.occupancy[piece.color_code] |= bit
+                self.occupied |= bit
+                if piece.type_code == KING:
+                    self.king_squares[piece.color_code] = (row, col)
     
     def move_piece(self, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
-
+        """Play a validated move for real; unlike make_move it leaves no undo token behind"""
+        # a real move under a search in progress would be taken back by it
+        if self._undo_stack:
+            raise ValueError("move_piece called with search moves still to unmake")
         piece = self.get_piece(from_row, from_col)
         if piece is None:
             return False
         
         # valid??
-        valid_moves = piece.get_valid_moves(self)
-        if (to_row, to_col) not in valid_moves:
+        legal_moves = self.generate_legal_moves(piece.color, from_row, from_col)
+        if (from_row, from_col, to_row, to_col) not in legal_moves:
             return False
         
 
-        if self._would_be_in_check(piece, from_row, from_col, to_row, to_col):
-            return False
+        self._apply_move((from_row, from_col, to_row, to_col))
+        return True
+    
+    def make_move(self, move: Move) -> UndoToken:
+        """
+        Play a move without validating it and push an undo token. Search code
+        should only pass moves from generate_legal_moves and must hand the
+        tokens back to unmake_move in reverse order.
+        """
+        token = self._apply_move(move)
+        self._undo_stack.append(token)
+        return token
+    
+    def _apply_move(self, move: Move) -> UndoToken:
+        """Play a move and return what it changed, without touching the undo stack"""
+        if self._shared:
+            self._unshare()
+        from_row, from_col, to_row, to_col = move
+        piece = self.board[from_row][from_col]
+        captured_piece = self.board[to_row][to_col]
+        token = UndoToken(move, piece, captured_piece, piece.has_moved, self.winner, self.is_won)
         
-
-        captured_piece = self.get_piece(to_row, to_col)
         self.set_piece(from_row, from_col, None)
         self.set_piece(to_row, to_col, piece)
-        piece.move_to(to_row, to_col)
+        piece.has_moved = True
         
-
-        if captured_piece and captured_piece.piece_type == PieceType.KING:
+        if captured_piece and captured_piece.type_code == KING:
             self.winner = piece.color
             self.is_won = True
-        
-        return True
+        return token
     
-    def _would_be_in_check(self, piece: Piece, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
-
-        original_piece = self.get_piece(to_row, to_col)
-        self.set_piece(from_row, from_col, None)
-        self.set_piece(to_row, to_col, piece)
-        
- 
-        king_pos = self._find_king(piece.color)
-        in_check = self._is_in_check(king_pos[0], king_pos[1], piece.color)
-        
-        # Restore the board
-        self.set_piece(from_row, from_col, piece)
-        self.set_piece(to_row, to_col, original_piece)
+    def unmake_move(self, token: UndoToken):
+        """Take back the most recent make_move"""
+        # a board is never shared while it has tokens out, see copy()
+        if not self._undo_stack or self._undo_stack[-1] is not token:
+            raise ValueError("unmake_move called out of order")
+        token = self._undo_stack.pop()
         
-        return in_check
+        from_row, from_col, to_row, to_col = token.move
+        self.set_piece(from_row, from_col, token.piece)
+        self.set_piece(to_row, to_col, token.captured)
+        token.piece.has_moved = token.had_moved
+        self.winner = token.winner
+        self.is_won = token.is_won
     
-    def _find_king(self, color: Color) -> Tuple[int, int]:
+    def _find_king(self, color: Color) -> Optional[Tuple[int, int]]:
+        """Square of the given king, or None if it has been captured (board won)"""
+        return self.king_squares[COLOR_CODES[color]]
+    
+    def has_king(self, color: Color) -> bool:
 
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.piece_type == PieceType.KING and piece.color == color:
-                    return (row, col)
-        return (-1, -1)  # should never return this if game is valid
+        return self.king_squares[COLOR_CODES[color]] is not None
+    
+    def is_in_check(self, color: Color) -> bool:
+        """Whether color's king is attacked; False once it has been captured"""
+        king_pos = self.king_squares[COLOR_CODES[color]]
+        return king_pos is not None and self._is_in_check(king_pos[0], king_pos[1], color)
     
     def _is_in_check(self, king_row: int, king_col: int, king_color: Color) -> bool:
 
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.color != king_color:
-                    valid_moves = piece.get_valid_moves(self)
-                    if (king_row, king_col) in valid_moves:
-                        return True
+        enemy_color = Color.BLACK if king_color == Color.WHITE else Color.WHITE
+        return self.is_square_attacked(king_row, king_col, enemy_color)
+    
+    def is_square_attacked(self, row: int, col: int, by_color: Color, occupied: Optional[int] = None) -> bool:
+        """
+        Check whether any piece of by_color attacks the square, looking outward
+        from the square itself. `occupied` overrides the blocker mask, e.g. to
+        look through a king that is about to step away.
+        """
+        square = row * 8 + col
+        bitboards = self.bitboards
+        color_code = COLOR_CODES[by_color]
+        offset = color_code * 6
+        
+        if KNIGHT_ATTACKS[square] & bitboards[offset + KNIGHT]:
+            return True
+        if KING_ATTACKS[square] & bitboards[offset + KING]:
+            return True
+        # a pawn attacks this square from where an opposite-coloured pawn here would attack
+        if PAWN_ATTACKS[color_code ^ 1][square] & bitboards[offset + PAWN]:
+            return True
+        
+        queens = bitboards[offset + QUEEN]
+        orthogonal = bitboards[offset + ROOK] | queens
+        diagonal = bitboards[offset + BISHOP] | queens
+        if occupied is None:
+            occupied = self.occupied
+        for direction in range(8):
+            sliders = orthogonal if direction < 4 else diagonal
+            ray = RAY_MASKS[direction][square]
+            if not ray & sliders:
+                continue
+            blockers = ray & occupied
+            if RAY_ASCENDING[direction]:
+                nearest = blockers & -blockers
+            else:
+                nearest = 1 << (blockers.bit_length() - 1)
+            if nearest & sliders:
+                return True
         return False
     
-    def get_all_pieces(self, color: Color) -> List[Piece]:
+    def _attackers_to(self, row: int, col: int, by_color: Color) -> int:
+        """Bitboard of every piece of by_color attacking the square"""
+        square = row * 8 + col
+        bitboards = self.bitboards
+        color_code = COLOR_CODES[by_color]
+        offset = color_code * 6
+        attackers = (KNIGHT_ATTACKS[square] & bitboards[offset + KNIGHT]
+                     | KING_ATTACKS[square] & bitboards[offset + KING]
+                     | PAWN_ATTACKS[color_code ^ 1][square] & bitboards[offset + PAWN])
+        
+        queens = bitboards[offset + QUEEN]
+        orthogonal = bitboards[offset + ROOK] | queens
+        diagonal = bitboards[offset + BISHOP] | queens
+        occupied = self.occupied
+        for direction in range(8):
+            sliders = orthogonal if direction < 4 else diagonal
+            ray = RAY_MASKS[direction][square]
+            if not ray & sliders:
+                continue
+            blockers = ray & occupied
+            if RAY_ASCENDING[direction]:
+                nearest = blockers & -blockers
+            else:
+                nearest = 1 << (blockers.bit_length() - 1)
+            attackers |= nearest & sliders
+        return attackers
 
-        pieces = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.color == color:
-                    pieces.append(piece)
-        return pieces
-    
-    def get_valid_moves_for_color(self, color: Color) -> List[Tuple[int, int, int, int]]:
+    def king_captures(self, color: Color) -> List[Move]:
+        """
+        Legal moves of color that take the enemy king, which wins the board
+        on the spot. Built on an attack lookup from the king's square, so
+        the usual answer, none, costs a single _attackers_to; the legality
+        test is the one generate_legal_moves applies, so every move returned
+        is also in its list.
+        """
+        color_code = COLOR_CODES[color]
+        enemy_king = self.king_squares[color_code ^ 1]
+        if enemy_king is None:
+            return []
+        enemy_color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        attackers = self._attackers_to(enemy_king[0], enemy_king[1], color)
+        if not attackers:
+            return []
 
-        moves = []
-        pieces = self.get_all_pieces(color)
+        target_row, target_col = enemy_king
+        target = target_row * 8 + target_col
+        own_king = self.king_squares[color_code]
+        if own_king is None:
+            return [(square >> 3, square & 7, target_row, target_col) for square in iter_squares(attackers)]
+        king_square = own_king[0] * 8 + own_king[1]
+        pins, check_mask = self._pins_and_check_mask(color, king_square)
+
+        captures = []
+        for square in iter_squares(attackers):
+            if square == king_square:
+                if self.is_square_attacked(target_row, target_col, enemy_color, self.occupied & ~(1 << king_square)):
+                    continue
+            elif not (check_mask & pins.get(square, FULL_BOARD)) >> target & 1:
+                continue
+            captures.append((square >> 3, square & 7, target_row, target_col))
+        return captures
+
+    def move_target_map(self, color: Color) -> int:
+        """
+        Bitboard of every square some piece of color reaches with
+        Piece.get_valid_moves, pins and checks aside: pawn pushes count,
+        pawn diagonals only onto enemy pieces, and squares holding color's
+        own pieces never do. This is what the medium AI has always meant by
+        a square its own side "attacks", which is not is_square_attacked.
+        """
+        bitboards = self.bitboards
+        color_code = COLOR_CODES[color]
+        offset = color_code * 6
+        occupied = self.occupied
+        reached = 0
+        for square in iter_squares(bitboards[offset + KNIGHT]):
+            reached |= KNIGHT_ATTACKS[square]
+        for square in iter_squares(bitboards[offset + KING]):
+            reached |= KING_ATTACKS[square]
+        pawn_attacks = PAWN_ATTACKS[color_code]
+        pawn_pushes = PAWN_PUSHES[color_code]
+        enemy = self.occupancy[color_code ^ 1]
+        for square in iter_squares(bitboards[offset + PAWN]):
+            reached |= pawn_attacks[square] & enemy
+            # pushes stop at the first blocked square
+            for to_row, to_col in pawn_pushes[square]:
+                bit = 1 << (to_row * 8 + to_col)
+                if occupied & bit:
+                    break
+                reached |= bit
+
+        queens = bitboards[offset + QUEEN]
+        for first_direction, sliders in ((0, bitboards[offset + ROOK] | queens),
+                                         (4, bitboards[offset + BISHOP] | queens)):
+            for square in iter_squares(sliders):
+                for direction in range(first_direction, first_direction + 4):
+                    ray = RAY_MASKS[direction][square]
+                    blockers = ray & occupied
+                    if blockers:
+                        # everything up to and including the nearest blocker
+                        if RAY_ASCENDING[direction]:
+                            nearest = (blockers & -blockers).bit_length() - 1
+                        else:
+                            nearest = blockers.bit_length() - 1
+                        ray &= ~RAY_MASKS[direction][nearest]
+                    reached |= ray
+        return reached & ~self.occupancy[color_code]
+
+    def _pins_and_check_mask(self, color: Color, king_square: int) -> Tuple[Dict[int, int], int]:
+        """
+        Work out, once per position, which of color's pieces are pinned and
+        where non-king moves must land to deal with a check.
         
-        for piece in pieces:
-            piece_moves = piece.get_valid_moves(self)
-            for to_row, to_col in piece_moves:
-                if not self._would_be_in_check(piece, piece.row, piece.col, to_row, to_col):
-                    moves.append((piece.row, piece.col, to_row, to_col))
+        Returns (pins, check_mask): pins maps a pinned piece's square to the
+        ray it may still move along (up to and including the pinner), and
+        check_mask is every square when not in check, the checker plus any
+        blocking squares for a single check, and empty for a double check.
+        """
+        enemy_color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        bitboards = self.bitboards
+        offset = COLOR_CODES[enemy_color] * 6
+        queens = bitboards[offset + QUEEN]
+        orthogonal = bitboards[offset + ROOK] | queens
+        diagonal = bitboards[offset + BISHOP] | queens
+        own = self.occupancy[COLOR_CODES[color]]
+        occupied = self.occupied
+        
+        checkers = self._attackers_to(king_square >> 3, king_square & 7, enemy_color)
+        check_mask = FULL_BOARD
+        if checkers:
+            check_mask = checkers if checkers & (checkers - 1) == 0 else 0
+        
+        pins: Dict[int, int] = {}
+        for direction in range(8):
+            sliders = orthogonal if direction < 4 else diagonal
+            ray = RAY_MASKS[direction][king_square]
+            if not ray & sliders:
+                continue
+            ascending = RAY_ASCENDING[direction]
+            blockers = ray & occupied
+            nearest = blockers & -blockers if ascending else 1 << (blockers.bit_length() - 1)
+            nearest_square = nearest.bit_length() - 1
+            if nearest & sliders:
+                # a sliding checker can also be blocked on the squares in between
+                if check_mask == checkers:
+                    check_mask |= ray ^ RAY_MASKS[direction][nearest_square]
+                continue
+            if not nearest & own:
+                continue
+            blockers &= RAY_MASKS[direction][nearest_square]
+            if not blockers:
+                continue
+            behind = blockers & -blockers if ascending else 1 << (blockers.bit_length() - 1)
+            if behind & sliders:
+                pins[nearest_square] = ray ^ RAY_MASKS[direction][behind.bit_length() - 1]
+        return pins, check_mask
+    
+    def generate_legal_moves(self, color: Color, from_row: Optional[int] = None,
+                             from_col: Optional[int] = None, captures_only: bool = False) -> List[Tuple[int, int, int, int]]:
+        """
+        Legal moves for color as (from_row, from_col, to_row, to_col), or just
+        the moves of the piece on (from_row, from_col) when given. Pins and
+        checkers are computed once up front, so no move is played and undone.
+        captures_only limits the result to moves that take a piece.
+        """
+        if from_row is None or from_col is None:
+            pieces = self.get_all_pieces(color)
+        else:
+            piece = self.get_piece(from_row, from_col)
+            pieces = [piece] if piece is not None and piece.color_code == COLOR_CODES[color] else []
+        targets = self.occupancy[COLOR_CODES[color] ^ 1] if captures_only else FULL_BOARD
         
+        king_pos = self.king_squares[COLOR_CODES[color]]
+        if king_pos is None:
+            # the board is already lost, nothing left to protect
+            return [(piece.row, piece.col, to_row, to_col)
+                    for piece in pieces for to_row, to_col in piece.get_valid_moves(self)
+                    if targets >> (to_row * 8 + to_col) & 1]
+        
+        king_row, king_col = king_pos
+        king_square = king_row * 8 + king_col
+        enemy_color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        pins, check_mask = self._pins_and_check_mask(color, king_square)
+        occupied_without_king = self.occupied & ~(1 << king_square)
+        
+        moves = []
+        for piece in pieces:
+            from_r, from_c = piece.row, piece.col
+            if piece.type_code == KING:
+                for to_row, to_col in piece.get_valid_moves(self):
+                    if (targets >> (to_row * 8 + to_col) & 1
+                            and not self.is_square_attacked(to_row, to_col, enemy_color, occupied_without_king)):
+                        moves.append((from_r, from_c, to_row, to_col))
+                continue
+            if not check_mask:
+                continue
+            allowed = check_mask & targets & pins.get(from_r * 8 + from_c, FULL_BOARD)
+            for to_row, to_col in piece.get_valid_moves(self):
+                if allowed >> (to_row * 8 + to_col) & 1:
+                    moves.append((from_r, from_c, to_row, to_col))
         return moves
     
+    def get_all_pieces(self, color: Color) -> List[Piece]:
+
+        board = self.board
+        return [board[square >> 3][square & 7] for square in iter_squares(self.occupancy[COLOR_CODES[color]])]
+    
+    def get_valid_moves_for_color(self, color: Color) -> List[Tuple[int, int, int, int]]:
+
+        return self.generate_legal_moves(color)
+    
     def is_checkmate(self, color: Color) -> bool:
 
         king_pos = self._find_king(color)
-        if king_pos == (-1, -1):
+        if king_pos is None:
             return True
-        
-       
+
+        # taking the enemy king wins the board, whatever is attacking ours
+        if self.king_captures(color):
+            return False
+
         if not self._is_in_check(king_pos[0], king_pos[1], color):
             return False
         
@@ -161,7 +508,7 @@ class ChessBoard:
     def is_stalemate(self, color: Color) -> bool:
         """Check if the given color is in stalemate"""
         king_pos = self._find_king(color)
-        if king_pos == (-1, -1):
+        if king_pos is None:
             return False
         
         
@@ -173,20 +520,67 @@ class ChessBoard:
         return len(valid_moves) == 0
     
     def copy(self) -> 'ChessBoard':
-
-        new_board = ChessBoard()
-        new_board.board = [[None for _ in range(8)] for _ in range(8)]
+        """
+        Copy-on-write snapshot: the clone shares this board's squares, pieces
+        and bitboards, and whichever of the two is modified first takes a
+        private copy, unless the other has been dropped by then, in which
+        case nothing is copied at all. The initial setup is never run and
+        the undo stack is not carried over.
+        
+        Undo tokens hold piece objects, so a board with search moves still
+        to unmake hands the clone private copies straight away instead of
+        sharing. A shared board therefore never has tokens out.
+        """
+        new_board = ChessBoard.__new__(ChessBoard)
+        new_board.board = self.board
         new_board.winner = self.winner
         new_board.is_won = self.is_won
-        
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece:
-                    new_board.set_piece(row, col, piece.copy())
-        
+        new_board.bitboards = self.bitboards
+        new_board.occupancy = self.occupancy
+        new_board.occupied = self.occupied
+        new_board.king_squares = self.king_squares
+        new_board.zobrist_key = self.zobrist_key
+        new_board.evaluation = self.evaluation
+        new_board._undo_stack = []
+        if self._undo_stack:
+            new_board._shared = False
+            new_board._sharing = None
+            new_board._copy_storage()
+            return new_board
+        with _SHARING_LOCK:
+            if self._sharing is None:
+                self._sharing = _Sharing()
+            self._sharing.boards += 1
+            new_board._sharing = self._sharing
+            new_board._shared = True
+            self._shared = True
         return new_board
     
+    def _unshare(self):
+        """Stop sharing storage, copying it only if another live board still uses it"""
+        with _SHARING_LOCK:
+            sharing = self._sharing
+            self._sharing = None
+            self._shared = False
+            sharing.boards -= 1
+            # copy under the lock: once the count drops to one, the last
+            # board may start writing in place
+            if sharing.boards:
+                self._copy_storage()
+    
+    def _copy_storage(self):
+        """Replace the square list, pieces and bitboards with private copies"""
+        self.board = [[piece.copy() if piece is not None else None for piece in row] for row in self.board]
+        self.bitboards = self.bitboards[:]
+        self.occupancy = self.occupancy[:]
+        self.king_squares = self.king_squares[:]
+    
+    def __del__(self):
+        sharing = getattr(self, "_sharing", None)
+        if sharing is not None:
+            with _SHARING_LOCK:
+                sharing.boards -= 1
+    
     def get_board_state(self) -> Dict:
 
         return {
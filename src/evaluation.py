@@ -0,0 +1,111 @@
+"""
+Static evaluation data: material and piece-square tables in centipawns.
+
+ChessBoard keeps a running total of these terms (ChessBoard.evaluation,
+from white's point of view) that set_piece updates as pieces come and go,
+so evaluating a position is a single attribute read.
+
+The tables are plain data and can be tuned. After editing PIECE_VALUES or
+PIECE_SQUARE_TABLES call refresh_square_values(); boards that already
+exist pick up the new numbers on their next _rebuild_bitboards().
+"""
+from typing import Dict, List
+from src.pieces import PieceType, PIECE_TYPES
+
+# The king is left out of material: a missing king ends the board and is
+# scored as a win by the search instead.
+PIECE_VALUES: Dict[PieceType, int] = {
+    PieceType.PAWN: 100,
+    PieceType.KNIGHT: 300,
+    PieceType.BISHOP: 300,
+    PieceType.ROOK: 500,
+    PieceType.QUEEN: 900,
+    PieceType.KING: 0,
+}
+
+# Bonuses for white pieces, laid out like the board: index 0 is a8 (row 0,
+# col 0) and index 63 is h1. Black uses the same tables mirrored top to bottom.
+PIECE_SQUARE_TABLES: Dict[PieceType, List[int]] = {
+    PieceType.PAWN: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0,
+    ],
+    PieceType.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    PieceType.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    PieceType.ROOK: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0,
+    ],
+    PieceType.QUEEN: [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+    ],
+    PieceType.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20,
+    ],
+}
+
+# SQUARE_VALUES[piece_code][square]: material plus table bonus, signed so
+# white pieces count positive and black pieces negative
+SQUARE_VALUES: List[List[int]] = [[0] * 64 for _ in range(12)]
+
+# material in centipawns indexed by type code
+TYPE_VALUES: List[int] = [0] * 6
+
+
+def refresh_square_values():
+    """Rebuild the derived lookup tables in place from PIECE_VALUES and PIECE_SQUARE_TABLES"""
+    for type_code, piece_type in enumerate(PIECE_TYPES):
+        value = PIECE_VALUES[piece_type]
+        table = PIECE_SQUARE_TABLES[piece_type]
+        TYPE_VALUES[type_code] = value
+        for square in range(64):
+            row, col = square >> 3, square & 7
+            SQUARE_VALUES[type_code][square] = value + table[square]
+            SQUARE_VALUES[6 + type_code][square] = -(value + table[(7 - row) * 8 + col])
+
+
+refresh_square_values()
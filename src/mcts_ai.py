@@ -0,0 +1,201 @@
+import math
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+from src.pieces import Color, KING
+from src.evaluation import TYPE_VALUES
+from src.position_cache import PositionCache
+from src.ultimate_ai import UltimateAI, BOARD_WIN_SCORE
+
+Move = Tuple[int, int, int, int]
+
+# UCT exploration constant
+EXPLORATION = 1.4
+# weight of the move prior, which fades as a child collects visits (progressive bias)
+PRIOR_WEIGHT = 1.0
+# random plies played past the tree before the position is scored
+PLAYOUT_DEPTH = 12
+# centipawns that turn into roughly 73% winning chances when squashed into [0, 1]
+EVAL_SCALE = 400
+# playouts between clock checks
+PLAYOUT_CHECK_INTERVAL = 8
+
+# priors: taking the king wins the board, other captures by victim value, quiet moves last
+KING_CAPTURE_PRIOR = 1.0
+QUIET_PRIOR = 0.05
+
+
+class _Node:
+    __slots__ = ("move", "parent", "children", "mover", "prior", "visits", "value")
+
+    def __init__(self, move: Optional[Move], parent: Optional["_Node"], mover: Optional[Color], prior: float):
+        self.move = move
+        self.parent = parent
+        # None until expanded; an empty list means the game can't go on from here
+        self.children: Optional[List["_Node"]] = None
+        # the side that played move, whose point of view value is kept from
+        self.mover = mover
+        self.prior = prior
+        self.visits = 0
+        self.value = 0.0
+
+
+class MCTSAI(UltimateAI):
+    """
+    The "mcts" difficulty: Monte Carlo tree search over the whole game.
+
+    Each iteration walks down the tree by UCT, with a capture-based prior
+    as progressive bias, expands one node, then plays PLAYOUT_DEPTH random
+    plies (always taking a king when it can) and scores what's left: 1 or
+    0 for a finished game or a checkmate on the current board, 0.5 for a
+    stalemate, otherwise the won-board lines plus every board's running
+    evaluation squashed into [0, 1]. Moves are played and taken back with
+    push_move / pop_move on the game itself rather than on copies of it;
+    each ply still allocates its undo tokens. The most visited root move
+    is played.
+    """
+    TIMED_DIFFICULTIES = ("mcts",)
+
+    def __init__(self, color: Color, difficulty: str = "mcts", time_limit: float = 2.0,
+                 node_limit: Optional[int] = None, position_cache: Optional[PositionCache] = None,
+                 seed: Optional[int] = None):
+        super().__init__(color, difficulty, time_limit, node_limit, position_cache=position_cache)
+        self._rng = random.Random(seed)
+        # playouts run by the last get_move, and how many per second
+        self.last_playouts = 0
+        self.last_playout_rate = 0.0
+
+    def get_move(self, game, stop_event: Optional[threading.Event] = None) -> Optional[Move]:
+        """Pick a move on game's current board; game is searched in place and left as it was"""
+        moves = game.legal_moves()
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return moves[0]
+
+        root = _Node(None, None, None, 0.0)
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+        playouts = 0
+        while True:
+            self._iterate(game, root)
+            playouts += 1
+            if playouts % PLAYOUT_CHECK_INTERVAL == 0:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                if self.node_limit is not None and playouts >= self.node_limit:
+                    break
+                if time.perf_counter() >= deadline:
+                    break
+
+        self.last_playouts = playouts
+        self.last_search_nodes = playouts
+        self.last_playout_rate = playouts / max(time.perf_counter() - start, 1e-9)
+        return max(root.children, key=lambda child: child.visits).move
+
+    def ponder(self, game, stop_event: Optional[threading.Event] = None) -> Optional[Move]:
+        """The tree is rebuilt every move, so there is nothing to get ahead on"""
+        return None
+
+    def _iterate(self, game, root: _Node):
+        node = root
+        pushed = 0
+        try:
+            # selection
+            while node.children and not game.game_over:
+                node = self._select(node)
+                game.push_move(*node.move)
+                pushed += 1
+            # expansion
+            if node.children is None and not game.game_over:
+                self._expand(game, node)
+                if node.children:
+                    node = self._select(node)
+                    game.push_move(*node.move)
+                    pushed += 1
+            result = self._playout(game)
+        finally:
+            for _ in range(pushed):
+                game.pop_move()
+
+        # backpropagation, result is from this AI's point of view
+        while node is not None:
+            node.visits += 1
+            node.value += result if node.mover == self.color else 1.0 - result
+            node = node.parent
+
+    def _select(self, node: _Node) -> _Node:
+        log_visits = math.log(node.visits + 1)
+        best_child = None
+        best_score = float('-inf')
+        for child in node.children:
+            if child.visits == 0:
+                # unvisited children go first, most promising prior first
+                score = 1e9 + child.prior
+            else:
+                score = (child.value / child.visits
+                         + EXPLORATION * math.sqrt(log_visits / child.visits)
+                         + PRIOR_WEIGHT * child.prior / (child.visits + 1))
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def _expand(self, game, node: _Node):
+        board = game.get_current_board()
+        squares = board.board
+        mover = game.current_player
+        children = []
+        for move in game.legal_moves():
+            victim = squares[move[2]][move[3]]
+            if victim is None:
+                prior = QUIET_PRIOR
+            elif victim.type_code == KING:
+                prior = KING_CAPTURE_PRIOR
+            else:
+                prior = 0.1 + TYPE_VALUES[victim.type_code] / 1000
+            children.append(_Node(move, node, mover, prior))
+        node.children = children
+
+    def _playout(self, game) -> float:
+        """Play random plies from here, score the result and take the plies back"""
+        rng = self._rng
+        pushed = 0
+        try:
+            while pushed < PLAYOUT_DEPTH and not game.game_over:
+                # a king capture, when there is one, is all legal_moves returns
+                moves = game.legal_moves()
+                if not moves:
+                    break
+                game.push_move(*moves[rng.randrange(len(moves))])
+                pushed += 1
+            return self._outcome(game)
+        finally:
+            for _ in range(pushed):
+                game.pop_move()
+
+    def _outcome(self, game) -> float:
+        """Chance of this AI winning from here, in [0, 1]"""
+        if game.game_over:
+            if game.winner is None:
+                return 0.5
+            return 1.0 if game.winner == self.color else 0.0
+        # no moves on the current board ends the game: lost when mated, drawn
+        # when stalemated, as UltimateAI._alpha_beta scores it
+        board = game.get_current_board()
+        if not board.is_won and not game.legal_moves():
+            side = game.current_player
+            if board.is_in_check(side):
+                return 0.0 if side == self.color else 1.0
+            return 0.5
+        score = self._line_score(game)
+        for row in game.boards:
+            for board in row:
+                if board.is_won:
+                    score += BOARD_WIN_SCORE if board.winner == Color.WHITE else -BOARD_WIN_SCORE
+                else:
+                    score += board.evaluation
+        if self.color == Color.BLACK:
+            score = -score
+        return 1.0 / (1.0 + math.exp(-score / EVAL_SCALE))
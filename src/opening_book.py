@@ -0,0 +1,89 @@
+"""
+Disk-backed opening book: moves for early positions, found offline by a
+deep search (see generate_opening_book.py) and looked up by Zobrist key.
+
+File layout, all little-endian:
+    header   magic b"HCOB", version (uint16), entry count n (uint32)
+    keys     n position keys (uint64), sorted ascending
+    moves    n moves packed as in the transposition table (uint16)
+
+Keys come from ChessBoard.position_key, which is stable across runs
+because the Zobrist tables use a fixed seed.
+"""
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+from src.transposition_table import pack_move, unpack_move
+
+Move = Tuple[int, int, int, int]
+
+MAGIC = b"HCOB"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "assets", "opening_book.bin")
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+class OpeningBook:
+    """Read-only book, loaded from disk on the first probe. A missing or unreadable file is an empty book."""
+
+    def __init__(self, path: str = DEFAULT_BOOK_PATH):
+        self.path = path
+        self._keys: Optional[array] = None
+        self._moves: Optional[array] = None
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._keys)
+
+    def probe(self, key: int) -> Optional[Move]:
+        """Book move for the position key, or None"""
+        self._load()
+        keys = self._keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            return unpack_move(self._moves[index])
+        return None
+
+    def _load(self):
+        if self._keys is not None:
+            return
+        self._keys = array('Q')
+        self._moves = array('H')
+        try:
+            with open(self.path, "rb") as book_file:
+                data = book_file.read()
+        except OSError:
+            return
+        if len(data) < HEADER.size:
+            return
+        magic, version, count = HEADER.unpack_from(data)
+        keys_end = HEADER.size + count * 8
+        if magic != MAGIC or version != VERSION or len(data) != keys_end + count * 2:
+            return
+        self._keys.frombytes(data[HEADER.size:keys_end])
+        self._moves.frombytes(data[keys_end:])
+        _little_endian(self._keys)
+        _little_endian(self._moves)
+
+
+def write_opening_book(path: str, entries: Dict[int, Move]):
+    """Write entries (position key -> move) in the book format"""
+    keys = sorted(entries)
+    key_array = _little_endian(array('Q', keys))
+    move_array = _little_endian(array('H', (pack_move(entries[key]) for key in keys)))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, VERSION, len(keys)))
+        book_file.write(key_array.tobytes())
+        book_file.write(move_array.tobytes())
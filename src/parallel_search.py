@@ -0,0 +1,87 @@
+"""
+Lazy-SMP search for the hard AI.
+
+Every worker process runs the ordinary iterative-deepening search on the
+same position. They share nothing but one transposition table laid over
+shared memory, so whatever one worker finds is a table hit for the
+others. Helpers with an odd index start one ply deeper, which spreads the
+workers over different parts of the tree.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing.sharedctypes import RawArray
+from typing import List, Optional, Tuple
+from src.pieces import Color
+from src.chess_board import ChessBoard
+from src.chess_ai import ChessAI
+from src.transposition_table import TranspositionTable
+
+Move = Tuple[int, int, int, int]
+
+# how often, in seconds, the caller's stop event is checked while the workers search
+STOP_POLL_INTERVAL = 0.01
+
+# per-process search state, set up once by _init_worker
+_worker_ai: Optional[ChessAI] = None
+
+
+def _init_worker(table_memory, color: Color, max_depth: int, stop_event):
+    global _worker_ai
+    _worker_ai = ChessAI(color, "hard", max_depth=max_depth)
+    _worker_ai._tt = TranspositionTable(buffer=memoryview(table_memory).cast('B'))
+    _worker_ai._stop_event = stop_event
+
+
+def _search_task(board: ChessBoard, valid_moves: List[Move], time_limit: float, node_limit: Optional[int],
+                 generation: int, worker_index: int) -> Tuple[Move, int, int]:
+    """Search board in this worker, returning (best move, depth completed, nodes)"""
+    ai = _worker_ai
+    ai.time_limit = time_limit
+    ai.node_limit = node_limit
+    ai._start_search()
+    # the parent's counter is the one that matters, the workers' own ones drift
+    ai._tt.generation = generation
+    move = ai._iterative_deepening(board, valid_moves, 1 + worker_index % 2)
+    return move, ai.last_search_depth, ai.last_search_nodes
+
+
+class ParallelSearch:
+    """A pool of search processes sharing one transposition table"""
+
+    def __init__(self, color: Color, workers: int, tt_size_mb: float = 16, max_depth: int = 32, mp_context=None):
+        mp_context = mp_context or multiprocessing.get_context()
+        self.workers = workers
+        self._table_memory = RawArray('B', TranspositionTable.bytes_for(tt_size_mb))
+        # the parent's view of the shared table, for probes and for pondering
+        self.transposition_table = TranspositionTable(buffer=memoryview(self._table_memory).cast('B'))
+        self._stop = mp_context.Event()
+        self._executor = ProcessPoolExecutor(workers, mp_context=mp_context, initializer=_init_worker,
+                                             initargs=(self._table_memory, color, max_depth, self._stop))
+
+    def search(self, board: ChessBoard, valid_moves: List[Move], time_limit: float, node_limit: Optional[int] = None,
+               stop_event=None) -> Tuple[Move, int, int]:
+        """
+        Search with every worker until worker 0 finishes or stop_event is
+        set, then return (best move, depth, total nodes) from the worker
+        that completed the deepest iteration, worker 0 on ties.
+        """
+        tt = self.transposition_table
+        tt.new_search()
+        self._stop.clear()
+        futures = [self._executor.submit(_search_task, board, valid_moves, time_limit, node_limit,
+                                         tt.generation, worker_index)
+                   for worker_index in range(self.workers)]
+        try:
+            while not futures[0].done():
+                wait(futures[:1], timeout=STOP_POLL_INTERVAL)
+                if stop_event is not None and stop_event.is_set():
+                    break
+        finally:
+            self._stop.set()
+        results = [future.result() for future in futures]
+        move, depth, _ = max(results, key=lambda result: result[1])
+        return move, depth, sum(result[2] for result in results)
+
+    def close(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,8 @@
 from enum import Enum
 from typing import List, Tuple, Optional, TYPE_CHECKING
+from src.attack_tables import (
+    BISHOP_RAYS, KING_TARGETS, KNIGHT_TARGETS, PAWN_ATTACK_TARGETS, PAWN_PUSHES, ROOK_RAYS,
+)
 
 if TYPE_CHECKING:
     from src.chess_board import ChessBoard
@@ -16,94 +19,75 @@ class Color(Enum):
     WHITE = "white"
     BLACK = "black"
 
+# integer codes used on hot paths; a piece's code is color_code * 6 + type_code
+PAWN, ROOK, KNIGHT, BISHOP, QUEEN, KING = range(6)
+WHITE, BLACK = 0, 1
+
+# code -> enum views for the UI, and enum -> code for the public API
+PIECE_TYPES: Tuple[PieceType, ...] = tuple(PieceType)
+COLORS: Tuple[Color, ...] = (Color.WHITE, Color.BLACK)
+TYPE_CODES = {piece_type: code for code, piece_type in enumerate(PIECE_TYPES)}
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+
+# indexed by piece code
+SYMBOLS = "PRNBQKprnbqk"
+
 class Piece:
+    __slots__ = ("type_code", "color_code", "code", "row", "col", "has_moved")
+    
     def __init__(self, piece_type: PieceType, color: Color, row: int, col: int):
-        self.piece_type = piece_type
-        self.color = color
+        self.type_code = TYPE_CODES[piece_type]
+        self.color_code = COLOR_CODES[color]
+        self.code = self.color_code * 6 + self.type_code
         self.row = row
         self.col = col
         self.has_moved = False
+    
+    @property
+    def piece_type(self) -> PieceType:
+        return PIECE_TYPES[self.type_code]
+    
+    @property
+    def color(self) -> Color:
+        return COLORS[self.color_code]
         
     def get_symbol(self) -> str:
 
-        symbols = {
-            (PieceType.PAWN, Color.WHITE): "P",
-            (PieceType.ROOK, Color.WHITE): "R",
-            (PieceType.KNIGHT, Color.WHITE): "N",
-            (PieceType.BISHOP, Color.WHITE): "B",
-            (PieceType.QUEEN, Color.WHITE): "Q",
-            (PieceType.KING, Color.WHITE): "K",
-            (PieceType.PAWN, Color.BLACK): "p",
-            (PieceType.ROOK, Color.BLACK): "r",
-            (PieceType.KNIGHT, Color.BLACK): "n",
-            (PieceType.BISHOP, Color.BLACK): "b",
-            (PieceType.QUEEN, Color.BLACK): "q",
-            (PieceType.KING, Color.BLACK): "k",
-        }
-        return symbols.get((self.piece_type, self.color), "?")
+        return SYMBOLS[self.code]
     
     def get_valid_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
 
-        moves = []
-        
-        if self.piece_type == PieceType.PAWN:
-            moves = self._get_pawn_moves(board)
-        elif self.piece_type == PieceType.ROOK:
-            moves = self._get_rook_moves(board)
-        elif self.piece_type == PieceType.KNIGHT:
-            moves = self._get_knight_moves(board)
-        elif self.piece_type == PieceType.BISHOP:
-            moves = self._get_bishop_moves(board)
-        elif self.piece_type == PieceType.QUEEN:
-            moves = self._get_queen_moves(board)
-        elif self.piece_type == PieceType.KING:
-            moves = self._get_king_moves(board)
-            
-        return moves
+        return _MOVE_GENERATORS[self.type_code](self, board)
     
     def _get_pawn_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
         moves = []
-        direction = -1 if self.color == Color.WHITE else 1
-        start_row = 6 if self.color == Color.WHITE else 1
+        square = self.row * 8 + self.col
+        squares = board.board
         
+        # pushes stop at the first blocked square
+        for new_row, new_col in PAWN_PUSHES[self.color_code][square]:
+            if squares[new_row][new_col] is not None:
+                break
+            moves.append((new_row, new_col))
         
-        new_row = self.row + direction
-        if 0 <= new_row < 8 and board.get_piece(new_row, self.col) is None:
-            moves.append((new_row, self.col))
-            
-          
-            if self.row == start_row:
-                new_row = self.row + 2 * direction
-                if 0 <= new_row < 8 and board.get_piece(new_row, self.col) is None:
-                    moves.append((new_row, self.col))
-        
-      
-        for col_offset in [-1, 1]:
-            new_col = self.col + col_offset
-            new_row = self.row + direction
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                piece = board.get_piece(new_row, new_col)
-                if piece is not None and piece.color != self.color:
-                    moves.append((new_row, new_col))
+        for new_row, new_col in PAWN_ATTACK_TARGETS[self.color_code][square]:
+            piece = squares[new_row][new_col]
+            if piece is not None and piece.color_code != self.color_code:
+                moves.append((new_row, new_col))
         
         return moves
     
-    def _get_rook_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
+    def _get_slider_moves(self, board: 'ChessBoard', rays) -> List[Tuple[int, int]]:
         moves = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        square = self.row * 8 + self.col
+        squares = board.board
         
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row = self.row + dr * i
-                new_col = self.col + dc * i
-                
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                    
-                piece = board.get_piece(new_row, new_col)
+        for direction_rays in rays:
+            for new_row, new_col in direction_rays[square]:
+                piece = squares[new_row][new_col]
                 if piece is None:
                     moves.append((new_row, new_col))
-                elif piece.color != self.color:
+                elif piece.color_code != self.color_code:
                     moves.append((new_row, new_col))
                     break
                 else:
@@ -111,64 +95,34 @@ class Piece:
         
         return moves
     
-    def _get_knight_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
+    def _get_leaper_moves(self, board: 'ChessBoard', targets) -> List[Tuple[int, int]]:
+        squares = board.board
         moves = []
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                       (1, -2), (1, 2), (2, -1), (2, 1)]
-        
-        for dr, dc in knight_moves:
-            new_row = self.row + dr
-            new_col = self.col + dc
-            
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                piece = board.get_piece(new_row, new_col)
-                if piece is None or piece.color != self.color:
-                    moves.append((new_row, new_col))
-        
+        for new_row, new_col in targets[self.row * 8 + self.col]:
+            piece = squares[new_row][new_col]
+            if piece is None or piece.color_code != self.color_code:
+                moves.append((new_row, new_col))
         return moves
     
+    def _get_rook_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
+
+        return self._get_slider_moves(board, ROOK_RAYS)
+    
+    def _get_knight_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
+
+        return self._get_leaper_moves(board, KNIGHT_TARGETS)
+    
     def _get_bishop_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
-        moves = []
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row = self.row + dr * i
-                new_col = self.col + dc * i
-                
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                    
-                piece = board.get_piece(new_row, new_col)
-                if piece is None:
-                    moves.append((new_row, new_col))
-                elif piece.color != self.color:
-                    moves.append((new_row, new_col))
-                    break
-                else:
-                    break
-        
-        return moves
+
+        return self._get_slider_moves(board, BISHOP_RAYS)
     
     def _get_queen_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
 
-        return self._get_rook_moves(board) + self._get_bishop_moves(board)
+        return self._get_slider_moves(board, ROOK_RAYS) + self._get_slider_moves(board, BISHOP_RAYS)
     
     def _get_king_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
-        moves = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0),
-                     (1, 1), (1, -1), (-1, 1), (-1, -1)]
-        
-        for dr, dc in directions:
-            new_row = self.row + dr
-            new_col = self.col + dc
-            
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                piece = board.get_piece(new_row, new_col)
-                if piece is None or piece.color != self.color:
-                    moves.append((new_row, new_col))
-        
-        return moves
+
+        return self._get_leaper_moves(board, KING_TARGETS)
     
     def move_to(self, row: int, col: int):
 
@@ -177,6 +131,22 @@ class Piece:
         self.has_moved = True
     
     def copy(self) -> 'Piece':
-        new_piece = Piece(self.piece_type, self.color, self.row, self.col)
+        new_piece = Piece.__new__(Piece)
+        new_piece.type_code = self.type_code
+        new_piece.color_code = self.color_code
+        new_piece.code = self.code
+        new_piece.row = self.row
+        new_piece.col = self.col
         new_piece.has_moved = self.has_moved
         return new_piece
+
+
+# indexed by type code
+_MOVE_GENERATORS = (
+    Piece._get_pawn_moves,
+    Piece._get_rook_moves,
+    Piece._get_knight_moves,
+    Piece._get_bishop_moves,
+    Piece._get_queen_moves,
+    Piece._get_king_moves,
+)
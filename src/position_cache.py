@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+Move = Tuple[int, int, int, int]
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+class _Entry:
+    __slots__ = ("moves", "best_move", "evaluation")
+
+    def __init__(self):
+        self.moves: Optional[Tuple[Move, ...]] = None
+        self.best_move: Optional[Move] = None
+        self.evaluation: Optional[int] = None
+
+
+class PositionCache:
+    """
+    Results about single-board positions, shared by every board of a game.
+
+    Entries are keyed by ChessBoard.position_key (placement plus side to
+    move), so identical boards and transpositions share one entry holding
+    whatever has been worked out for it so far: the legal moves, the
+    move the AI's search settled on and a static evaluation. The least
+    recently used entry is evicted once max_entries is reached.
+
+    The AI searches on a worker thread while the UI asks for legal moves,
+    so every access takes a lock.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_moves(self, key: int) -> Optional[Tuple[Move, ...]]:
+        return self._get(key, "moves")
+
+    def store_moves(self, key: int, moves):
+        self._store(key, "moves", tuple(moves))
+
+    def get_best_move(self, key: int) -> Optional[Move]:
+        return self._get(key, "best_move")
+
+    def store_best_move(self, key: int, move: Move):
+        self._store(key, "best_move", move)
+
+    def get_evaluation(self, key: int) -> Optional[int]:
+        return self._get(key, "evaluation")
+
+    def store_evaluation(self, key: int, evaluation: int):
+        self._store(key, "evaluation", evaluation)
+
+    def _get(self, key: int, field: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            value = getattr(entry, field) if entry is not None else None
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _store(self, key: int, field: str, value):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.popitem(last=False)
+                entry = self._entries[key] = _Entry()
+            else:
+                self._entries.move_to_end(key)
+            setattr(entry, field, value)
@@ -0,0 +1,114 @@
+from typing import Optional, Tuple
+
+Move = Tuple[int, int, int, int]
+
+# bound types
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# every entry is two 64-bit words: (key ^ data, data)
+ENTRY_WORDS = 2
+BUCKET_SIZE = 2
+BUCKET_BYTES = ENTRY_WORDS * BUCKET_SIZE * 8
+
+MASK_64 = (1 << 64) - 1
+
+# data word layout
+_SCORE_BITS = 32
+_SCORE_OFFSET = 1 << (_SCORE_BITS - 1)
+_DEPTH_SHIFT = 32
+_FLAG_SHIFT = 40
+_MOVE_SHIFT = 42
+_MOVE_VALID = 1 << 12
+_GENERATION_SHIFT = 55
+_GENERATION_MASK = 0x3F
+
+
+def pack_move(move: Optional[Move]) -> int:
+    if move is None:
+        return 0
+    from_row, from_col, to_row, to_col = move
+    return _MOVE_VALID | (from_row * 8 + from_col) << 6 | (to_row * 8 + to_col)
+
+
+def unpack_move(packed: int) -> Optional[Move]:
+    if not packed & _MOVE_VALID:
+        return None
+    from_square = (packed >> 6) & 63
+    to_square = packed & 63
+    return (from_square >> 3, from_square & 7, to_square >> 3, to_square & 7)
+
+
+class TranspositionTable:
+    """
+    Fixed-size store of search results keyed by position hash.
+
+    The table is a single preallocated buffer of 64-bit words split into
+    two-entry buckets. Slot 0 of a bucket is depth-preferred: it is only
+    replaced by a search at least as deep, or when its entry is left over
+    from an earlier search. Slot 1 is always-replace and takes every store
+    that doesn't qualify for slot 0.
+
+    Entries are written as (key ^ data, data), so a reader that sees a
+    half-written entry (possible when the buffer is shared between
+    processes) gets a miss instead of a wrong result.
+    """
+
+    def __init__(self, size_mb: float = 16, buffer=None):
+        """
+        Allocate size_mb of table, or lay the table over an existing writable
+        buffer (e.g. shared memory), in which case size_mb is ignored.
+        """
+        if buffer is None:
+            self.num_buckets = max(1, int(size_mb * 1024 * 1024) // BUCKET_BYTES)
+            buffer = bytearray(self.num_buckets * BUCKET_BYTES)
+        else:
+            self.num_buckets = max(1, len(buffer) // BUCKET_BYTES)
+        self._bytes = memoryview(buffer)[:self.num_buckets * BUCKET_BYTES]
+        self._words = self._bytes.cast('Q')
+        self.generation = 0
+
+    @staticmethod
+    def bytes_for(size_mb: float) -> int:
+        """Buffer size, in bytes, that a size_mb table uses"""
+        return max(1, int(size_mb * 1024 * 1024) // BUCKET_BYTES) * BUCKET_BYTES
+
+    def new_search(self):
+        """Age existing entries so they are replaced first"""
+        self.generation = (self.generation + 1) & _GENERATION_MASK
+
+    def clear(self):
+        self._bytes[:] = bytes(len(self._bytes))
+        self.generation = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, Optional[Move]]]:
+        """Return (depth, bound, score, best_move) stored for key, or None"""
+        words = self._words
+        base = (key % self.num_buckets) * (ENTRY_WORDS * BUCKET_SIZE)
+        for slot in range(base, base + ENTRY_WORDS * BUCKET_SIZE, ENTRY_WORDS):
+            data = words[slot + 1]
+            if data and words[slot] ^ data == key:
+                return ((data >> _DEPTH_SHIFT) & 0xFF,
+                        (data >> _FLAG_SHIFT) & 0x3,
+                        (data & 0xFFFFFFFF) - _SCORE_OFFSET,
+                        unpack_move((data >> _MOVE_SHIFT) & 0x1FFF))
+        return None
+
+    def store(self, key: int, depth: int, bound: int, score: int, best_move: Optional[Move]):
+        words = self._words
+        base = (key % self.num_buckets) * (ENTRY_WORDS * BUCKET_SIZE)
+        data = ((int(score) + _SCORE_OFFSET) & 0xFFFFFFFF
+                | min(depth, 0xFF) << _DEPTH_SHIFT
+                | bound << _FLAG_SHIFT
+                | pack_move(best_move) << _MOVE_SHIFT
+                | self.generation << _GENERATION_SHIFT)
+
+        deep_data = words[base + 1]
+        deep_key = words[base] ^ deep_data
+        if (not deep_data or deep_key == key
+                or depth >= (deep_data >> _DEPTH_SHIFT) & 0xFF
+                or (deep_data >> _GENERATION_SHIFT) & _GENERATION_MASK != self.generation):
+            slot = base
+        else:
+            slot = base + ENTRY_WORDS
+        words[slot] = (key ^ data) & MASK_64
+        words[slot + 1] = data
@@ -67,6 +67,8 @@ class UltimateChessUI:
         self.ai_move_delay = 2000  
         self.ai_thinking_text = ""
         self.ai_thinking_timer = 0
+        # search processes for the hard AI; stays at one until benchmark_ai.py shows more paying off
+        self.ai_workers = 1
 
 
         self.pending_board_swap = False
@@ -208,6 +210,7 @@ class UltimateChessUI:
                     elif event.key == pygame.K_z:
                         self.toggle_zoom()
                     elif event.key == pygame.K_m:
+                        self.game.cancel_ai_search()
                         self.show_menu = True
                         self.menu_open_start = pygame.time.get_ticks()
                     elif event.key == pygame.K_ESCAPE:
@@ -232,20 +235,8 @@ class UltimateChessUI:
                             cb_row, cb_col = self.game.current_board
                             current_board = self.game.get_current_board()
                             if not current_board.is_won:
-                                current_board.is_won = True
-                                current_board.winner = self.game.current_player
-                                # record in won_boards
-                                try:
-                                    self.game.won_boards[cb_row][cb_col] = current_board.winner
-                                except Exception:
-                                    pass
-                                # check for ultimate win
-                                try:
-                                    if self.game._check_ultimate_win(cb_row, cb_col, current_board.winner):
-                                        self.game.game_over = True
-                                        self.game.winner = current_board.winner
-                                except Exception:
-                                    pass
+                                # record in won_boards and check for ultimate win
+                                self.game.mark_board_won(cb_row, cb_col, self.game.current_player)
                                 # capture and show transition so user can see it
                                 pre = self.screen.copy()
                                 # draw updated state
@@ -257,12 +248,16 @@ class UltimateChessUI:
             self.update_animations(dt, current_time)
             
             # Handle AI moves
-            if self.game.is_ai_turn() and not self.game.game_over and not self.is_transitioning:
+            if self.game.is_ai_turn() and not self.game.game_over and not self.is_transitioning and not self.show_menu:
                 self.handle_ai_move(dt, current_time)
+            elif not self.game.game_over and not self.show_menu:
+                # no-op unless playing a timed AI on the human's turn
+                self.game.start_ponder()
             
             self.draw()
             pygame.display.flip()
         
+        self.game.cancel_ai_search()
         pygame.quit()
         sys.exit()
 
@@ -384,11 +379,16 @@ class UltimateChessUI:
             thinking_options = ["AI is thinking...", "AI is calculating...", "AI is strategizing...", "AI is planning..."]
             self.ai_thinking_text = thinking_options[(self.ai_thinking_timer // 500) % len(thinking_options)]
         
-        if self.ai_move_timer >= self.ai_move_delay:
+        # the search runs on a worker thread so the window keeps drawing while it thinks
+        if not self.game.ai_search_pending:
+            self.game.start_ai_search()
+        
+        move_delay = 0 if self.game.ai is not None and self.game.ai.is_timed else self.ai_move_delay
+        if self.ai_move_timer >= move_delay and self.game.ai_search_done():
             # Capture pre-render so we can crossfade after AI move
             pre_surf = self.screen.copy()
             # Make AI move
-            if self.game.make_ai_move():
+            if self.game.finish_ai_search():
                 # Render the updated board immediately to capture post state
                 self.draw()
                 post_surf = self.screen.copy()
@@ -494,6 +494,9 @@ class UltimateChessUI:
             elif 200 <= x <= 400 and 490 <= y <= 540:
                 self.ai_difficulty = "hard"
                 self.start_game()
+            elif 420 <= x <= 620 and 350 <= y <= 400:
+                self.ai_difficulty = "ultimate"
+                self.start_game()
     
     def handle_overview_click(self, pos: Tuple[int, int]):
         """Handle clicks in overview mode"""
@@ -541,7 +544,8 @@ class UltimateChessUI:
             
             if piece and piece.color == self.game.current_player:
                 self.selected_piece = (piece_row, piece_col)
-                self.valid_moves = piece.get_valid_moves(current_board)
+                self.valid_moves = [(to_row, to_col) for _, _, to_row, to_col
+                                    in current_board.generate_legal_moves(piece.color, piece_row, piece_col)]
         else:
             # Try to move the selected piece
             if (piece_row, piece_col) in self.valid_moves:
@@ -566,7 +570,8 @@ class UltimateChessUI:
     
     def start_game(self):
         """Start a new game with selected settings"""
-        self.game.set_game_mode(self.game_mode, self.ai_difficulty)
+        # the searching AI spends the move delay thinking instead of waiting it out
+        self.game.set_game_mode(self.game_mode, self.ai_difficulty, self.ai_move_delay / 1000, self.ai_workers)
         self.show_menu = False
         self.zoom_level = 0
         self.selected_piece = None
@@ -760,6 +765,13 @@ class UltimateChessUI:
             hard_text = self.font.render("Hard", True, self.WHITE)
             hard_rect = hard_text.get_rect(center=(300, 515))
             self.screen.blit(hard_text, hard_rect)
+            
+            # Ultimate button: searches across all 64 boards
+            pygame.draw.rect(self.screen, self.BUTTON_COLOR, (420, 350, 200, 50))
+            pygame.draw.rect(self.screen, self.WHITE, (420, 350, 200, 50), 2)
+            ultimate_text = self.font.render("Ultimate", True, self.WHITE)
+            ultimate_rect = ultimate_text.get_rect(center=(520, 375))
+            self.screen.blit(ultimate_text, ultimate_rect)
     
     def draw_overview(self):
         """Draw the overview of all boards"""
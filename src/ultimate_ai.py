@@ -0,0 +1,295 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+from src.pieces import Color, COLOR_CODES
+from src.chess_board import ChessBoard
+from src.chess_ai import (
+    ChessAI, _SearchTimeout, _score_from_tt, _score_to_tt,
+    WIN_SCORE, WIN_THRESHOLD, BUDGET_CHECK_INTERVAL,
+)
+from src.transposition_table import EXACT, LOWER_BOUND, UPPER_BOUND
+from src.position_cache import PositionCache
+
+Move = Tuple[int, int, int, int]
+
+# a won board, in centipawns, on top of whatever it adds to the lines below
+BOARD_WIN_SCORE = 1500
+# LINE_SCORES[n]: a row, column or long diagonal holding n won boards of one colour and none of the other
+LINE_SCORES = [0, 0, 100, 250, 500, 1000, 2000, 4000, 0]
+
+# the 18 lines of eight boards that win the game, as board numbers (row * 8 + col)
+WINNING_LINES: List[Tuple[int, ...]] = (
+    [tuple(row * 8 + col for col in range(8)) for row in range(8)]
+    + [tuple(row * 8 + col for row in range(8)) for col in range(8)]
+    + [tuple(i * 8 + i for i in range(8)), tuple(i * 8 + 7 - i for i in range(8))]
+)
+
+
+class UltimateAI(ChessAI):
+    """
+    The "ultimate" difficulty: an alpha-beta search over the whole game
+    instead of the current board, so it sees which board each move sends
+    the opponent to and plays for lines of won boards.
+
+    The evaluation adds up a score for every board plus the lines of won
+    boards. A board's score is a capture-only search of it, cached by
+    position key in the game's PositionCache; only the board a move is
+    played on changes, so the sum is kept up to date as the search goes
+    and each new position costs one cache lookup or one small search.
+    """
+    TIMED_DIFFICULTIES = ("ultimate",)
+    searches_game = True
+
+    def __init__(self, color: Color, difficulty: str = "ultimate", time_limit: float = 2.0,
+                 node_limit: Optional[int] = None, max_depth: int = 32, tt_size_mb: float = 16,
+                 position_cache: Optional[PositionCache] = None):
+        super().__init__(color, difficulty, time_limit, node_limit, max_depth, tt_size_mb)
+        # board scores from white's point of view, normally the game's cache so
+        # every identical board is only ever scored once
+        self.position_cache = position_cache if position_cache is not None else PositionCache()
+        # line score from white's point of view, by the game's won-boards key
+        self._line_scores: Dict[int, int] = {}
+        # sum of every board's score with white to move, maintained by _push and _pop
+        self._boards_total = 0
+        self._total_deltas: List[int] = []
+
+    def new_game(self):
+        super().new_game()
+        self._line_scores.clear()
+
+    def get_move(self, game, stop_event: Optional[threading.Event] = None) -> Optional[Move]:
+        """Pick a move on game's current board; game is searched in place and left as it was"""
+        self._stop_event = stop_event
+        valid_moves = game.get_valid_moves()
+        if not valid_moves:
+            return None
+        # nothing to choose, e.g. a king capture, which get_valid_moves returns on its own
+        if len(valid_moves) == 1:
+            return valid_moves[0]
+
+        if self._ponder_result is not None:
+            ponder_key, ponder_move = self._ponder_result
+            self._ponder_result = None
+            if ponder_key == game.zobrist_key and ponder_move in valid_moves:
+                return ponder_move
+
+        self._start_search()
+        return self._search_game(game, valid_moves)
+
+    def ponder(self, game, stop_event: Optional[threading.Event] = None) -> Optional[Move]:
+        """Like ChessAI.ponder, on the whole game"""
+        if game.game_over or game.current_player == self.color:
+            return None
+        opponent_moves = game.get_valid_moves()
+        if not opponent_moves:
+            return None
+
+        self._stop_event = stop_event
+        self._start_search()
+        entry = self._tt.probe(game.zobrist_key)
+        predicted = self._order_moves(game.get_current_board(), opponent_moves, 0, entry[3] if entry else None,
+                                      COLOR_CODES[game.current_player])[0]
+
+        # scoring the boards checks the budget too, so stopping can land here
+        try:
+            self._boards_total = self._total_board_score(game)
+            self._push(game, predicted)
+        except _SearchTimeout:
+            return predicted
+        try:
+            valid_moves = game.get_valid_moves()
+            if game.game_over or game.current_player != self.color or not valid_moves:
+                return predicted
+            move = self._search_game(game, valid_moves)
+            if stop_event is None or not stop_event.is_set():
+                self._ponder_result = (game.zobrist_key, move)
+        finally:
+            self._pop(game)
+        return predicted
+
+    def _search_game(self, game, valid_moves: List[Move]) -> Move:
+        """Iterative deepening over the game, as ChessAI._iterative_deepening does for one board"""
+        tt = self._tt
+        root_key = game.zobrist_key
+
+        best_move = None
+        entry = tt.probe(root_key)
+        root_moves = self._order_moves(game.get_current_board(), list(valid_moves), 0,
+                                       entry[3] if entry else None, COLOR_CODES[self.color])
+        try:
+            self._boards_total = self._total_board_score(game)
+        except _SearchTimeout:
+            self.last_search_nodes = self._nodes
+            return root_moves[0]
+        for depth in range(1, self.max_depth + 1):
+            self._root_depth = depth
+            try:
+                score, move = self._search_root_game(game, root_moves, depth)
+            except _SearchTimeout:
+                break
+
+            best_move = move
+            self.last_search_depth = depth
+            tt.store(root_key, depth, EXACT, score, move)
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= WIN_THRESHOLD:
+                break
+
+        self.last_search_nodes = self._nodes
+        return best_move if best_move else root_moves[0]
+
+    def _search_root_game(self, game, root_moves: List[Move], depth: int) -> Tuple[float, Move]:
+        best_move = root_moves[0]
+        best_score = float('-inf')
+        alpha = float('-inf')
+
+        for move in root_moves:
+            self._push(game, move)
+            try:
+                score = self._alpha_beta(game, depth - 1, alpha, float('inf'), 1)
+            finally:
+                self._pop(game)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+
+        return best_score, best_move
+
+    def _alpha_beta(self, game, depth: int, alpha: float, beta: float, ply: int) -> float:
+        self._nodes += 1
+        if self._nodes % BUDGET_CHECK_INTERVAL == 0:
+            self._check_budget()
+
+        if game.game_over:
+            if game.winner is None:
+                return 0
+            return WIN_SCORE - ply if game.winner == self.color else ply - WIN_SCORE
+        if depth == 0:
+            return self._evaluate_game(game)
+
+        side_to_move = game.current_player
+        maximizing = side_to_move == self.color
+
+        tt = self._tt
+        key = game.zobrist_key
+        entry = tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, bound, entry_score, tt_move = entry
+            if entry_depth >= depth:
+                entry_score = _score_from_tt(entry_score, ply)
+                if bound == EXACT:
+                    return entry_score
+                if bound == LOWER_BOUND and entry_score >= beta:
+                    return entry_score
+                if bound == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score
+
+        board = game.get_current_board()
+        valid_moves = game.get_valid_moves()
+        if not valid_moves:
+            # the game can't go on from here: a board won on the first move of
+            # its pair, or a side with no moves on the current board
+            if board.is_won:
+                return self._evaluate_game(game)
+            if board.is_in_check(side_to_move):
+                return ply - WIN_SCORE if maximizing else WIN_SCORE - ply
+            return 0
+        side_code = COLOR_CODES[side_to_move]
+        valid_moves = self._order_moves(board, valid_moves, ply, tt_move, side_code)
+
+        alpha_orig, beta_orig = alpha, beta
+        best_move = None
+        best_eval = float('-inf') if maximizing else float('inf')
+        for move in valid_moves:
+            self._push(game, move)
+            try:
+                eval_score = self._alpha_beta(game, depth - 1, alpha, beta, ply + 1)
+            finally:
+                self._pop(game)
+
+            if maximizing:
+                if eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = move
+                alpha = max(alpha, eval_score)
+            else:
+                if eval_score < best_eval:
+                    best_eval = eval_score
+                    best_move = move
+                beta = min(beta, eval_score)
+            if beta <= alpha:
+                self._record_cutoff(board, move, depth, ply, side_code)
+                break
+
+        if best_eval <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_eval >= beta_orig:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        tt.store(key, depth, bound, _score_to_tt(best_eval, ply), best_move)
+        return best_eval
+
+    def _push(self, game, move: Move):
+        """game.push_move, keeping the running board total in step"""
+        board = game.get_current_board()
+        before = self._board_score(board, Color.WHITE)
+        game.push_move(*move)
+        try:
+            delta = self._board_score(board, Color.WHITE) - before
+        except _SearchTimeout:
+            game.pop_move()
+            raise
+        self._boards_total += delta
+        self._total_deltas.append(delta)
+
+    def _pop(self, game):
+        game.pop_move()
+        self._boards_total -= self._total_deltas.pop()
+
+    def _total_board_score(self, game) -> int:
+        return sum(self._board_score(board, Color.WHITE) for row in game.boards for board in row)
+
+    def _evaluate_game(self, game) -> float:
+        """Board scores plus lines of won boards, from this AI's point of view"""
+        # the running total has white to move everywhere; put the right side to move on the current board
+        board = game.get_current_board()
+        score = (self._boards_total - self._board_score(board, Color.WHITE)
+                 + self._board_score(board, game.current_player) + self._line_score(game))
+        return score if self.color == Color.WHITE else -score
+
+    def _board_score(self, board: ChessBoard, side_to_move: Color) -> int:
+        """Capture-resolved score of one board from white's point of view, cached by position"""
+        if board.is_won:
+            return BOARD_WIN_SCORE if board.winner == Color.WHITE else -BOARD_WIN_SCORE
+        key = board.position_key(side_to_move)
+        score = self.position_cache.get_evaluation(key)
+        if score is None:
+            score = self._quiescence(board, side_to_move == self.color, float('-inf'), float('inf'), 0)
+            # a king left hanging means the board is as good as won
+            if score >= WIN_THRESHOLD:
+                score = BOARD_WIN_SCORE
+            elif score <= -WIN_THRESHOLD:
+                score = -BOARD_WIN_SCORE
+            if self.color == Color.BLACK:
+                score = -score
+            self.position_cache.store_evaluation(key, score)
+        return score
+
+    def _line_score(self, game) -> int:
+        key = game._won_boards_key
+        score = self._line_scores.get(key)
+        if score is None:
+            won = [winner for row in game.won_boards for winner in row]
+            score = 0
+            for line in WINNING_LINES:
+                white = sum(1 for square in line if won[square] == Color.WHITE)
+                black = sum(1 for square in line if won[square] == Color.BLACK)
+                if not black:
+                    score += LINE_SCORES[white]
+                elif not white:
+                    score -= LINE_SCORES[black]
+            self._line_scores[key] = score
+        return score
@@ -1,19 +1,55 @@
 import pygame
 import random
-from typing import List, Tuple, Optional, Dict
-from src.chess_board import ChessBoard
-from src.pieces import Color
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Tuple, Optional, Dict, NamedTuple
+from src.chess_board import ChessBoard, UndoToken
+from src.pieces import Color, COLOR_CODES
 from src.chess_ai import ChessAI
+from src.ultimate_ai import UltimateAI
+from src.mcts_ai import MCTSAI
+from src.position_cache import PositionCache
+from src.board_tensor import build_tensor, tensor_code
+from src.zobrist import CURRENT_BOARD_KEYS, MOVES_ON_BOARD_KEYS, SIDE_KEY, WON_BOARD_KEYS, mix_board_key
+
+# Every board starts from this position. It is only ever copied, never played on,
+# so all untouched boards in every game share its storage.
+_INITIAL_BOARD = ChessBoard()
+
+def _initial_boards() -> List[List[ChessBoard]]:
+    """8x8 grid of copy-on-write boards, each materialised on its first move"""
+    return [[_INITIAL_BOARD.copy() for _ in range(8)] for _ in range(8)]
+
+# signed piece codes of a fresh game, see src.board_tensor
+_INITIAL_TENSOR = build_tensor([[_INITIAL_BOARD] * 8] * 8)
+
+class GameUndoToken(NamedTuple):
+    """Meta-board state push_move changed, next to the board's own undo token"""
+    board_undo: UndoToken
+    board_position: Tuple[int, int]
+    current_player: Color
+    moves_on_current_board: int
+    game_over: bool
+    winner: Optional[Color]
+    won_board: Optional[Color]
+    won_boards_key: int
+
+def _create_ai(difficulty: str, time_limit: float, workers: int, position_cache: PositionCache) -> ChessAI:
+    if difficulty == "ultimate":
+        return UltimateAI(Color.BLACK, difficulty, time_limit, position_cache=position_cache)
+    if difficulty == "mcts":
+        return MCTSAI(Color.BLACK, difficulty, time_limit, position_cache=position_cache)
+    return ChessAI(Color.BLACK, difficulty, time_limit, workers=workers)
 
 class UltimateChessBoard:
-    def __init__(self, game_mode: str = "2player", ai_difficulty: str = "medium"):
+    def __init__(self, game_mode: str = "2player", ai_difficulty: str = "medium", ai_time_limit: float = 2.0,
+                 ai_workers: int = 1):
         # Create 8x8 grid of chess boards
-        self.boards: List[List[ChessBoard]] = []
-        for row in range(8):
-            board_row = []
-            for col in range(8):
-                board_row.append(ChessBoard())
-            self.boards.append(board_row)
+        self.boards: List[List[ChessBoard]] = _initial_boards()
+        # int8 piece codes of every board, [board_row, board_col, row, col], kept in step with the moves
+        self.tensor = _INITIAL_TENSOR.copy()
+        # flat view of the tensor; single cells are much cheaper to write through it than through numpy indexing
+        self._tensor_cells = self.tensor.reshape(-1).data
         
         # Game state
         self.current_player = Color.WHITE
@@ -24,7 +60,13 @@ class UltimateChessBoard:
         # Game mode settings
         self.game_mode = game_mode  # "2player" or "vs_cpu"
         self.ai_difficulty = ai_difficulty
-        self.ai = ChessAI(Color.BLACK, ai_difficulty) if game_mode == "vs_cpu" else None
+        # seconds the AI may search per move (used by the timed difficulties)
+        self.ai_time_limit = ai_time_limit
+        # processes the hard AI searches with
+        self.ai_workers = ai_workers
+        # legal moves, AI moves and board scores, shared by identical boards
+        self.position_cache = PositionCache()
+        self.ai = _create_ai(ai_difficulty, ai_time_limit, ai_workers, self.position_cache) if game_mode == "vs_cpu" else None
         
         # Track which boards are won
         self.won_boards: List[List[Optional[Color]]] = [[None for _ in range(8)] for _ in range(8)]
@@ -36,6 +78,78 @@ class UltimateChessBoard:
         # Dual-move system: track moves per board
         self.moves_on_current_board = 0
         self.max_moves_per_board = 2
+        
+        # undo stack for push_move / pop_move
+        self._search_undo: List[GameUndoToken] = []
+        
+        # background AI search: one worker thread, started on first use
+        self._ai_executor: Optional[ThreadPoolExecutor] = None
+        self._ai_future: Optional[Future] = None
+        self._ai_stop: Optional[threading.Event] = None
+        # game key the running search was started from, to spot stale results
+        self._ai_search_key = 0
+        # pondering: the AI searches on the human's time, sharing the worker thread
+        self.pondering_enabled = True
+        self._ponder_future: Optional[Future] = None
+        self._ponder_stop: Optional[threading.Event] = None
+        # game key of the position last pondered, so it is only pondered once
+        self._ponder_key: Optional[int] = None
+        
+        self._init_zobrist()
+    
+    def _init_zobrist(self):
+        """Rebuild the incremental parts of the combined position key"""
+        # xor of every board's key, each scrambled with its board number
+        self._boards_key = 0
+        # xor of WON_BOARD_KEYS for every won board
+        self._won_boards_key = 0
+        for row in range(8):
+            for col in range(8):
+                self._boards_key ^= mix_board_key(self.boards[row][col].zobrist_key, row * 8 + col)
+                winner = self.won_boards[row][col]
+                if winner is not None:
+                    self._won_boards_key ^= WON_BOARD_KEYS[row * 8 + col][COLOR_CODES[winner]]
+    
+    @property
+    def zobrist_key(self) -> int:
+        """Key of the whole game state: all 64 boards, the active board, side to move, dual-move count and won boards"""
+        board_row, board_col = self.current_board
+        key = (self._boards_key ^ self._won_boards_key
+               ^ CURRENT_BOARD_KEYS[board_row * 8 + board_col]
+               ^ MOVES_ON_BOARD_KEYS[self.moves_on_current_board])
+        if self.current_player == Color.BLACK:
+            key ^= SIDE_KEY
+        return key
+    
+    def _update_board_key(self, board_row: int, board_col: int, old_key: int):
+        """Fold a board's key change into the combined key"""
+        board_index = board_row * 8 + board_col
+        self._boards_key ^= (mix_board_key(old_key, board_index)
+                             ^ mix_board_key(self.boards[board_row][board_col].zobrist_key, board_index))
+    
+    def _update_tensor(self, board_row: int, board_col: int, from_row: int, from_col: int, to_row: int, to_col: int):
+        """Mirror a move just played on a board in the tensor"""
+        base = (board_row * 8 + board_col) * 64
+        cells = self._tensor_cells
+        cells[base + to_row * 8 + to_col] = cells[base + from_row * 8 + from_col]
+        cells[base + from_row * 8 + from_col] = 0
+    
+    def mark_board_won(self, board_row: int, board_col: int, winner: Color) -> bool:
+        """Record a won board; returns True if it also wins the whole game"""
+        board = self.boards[board_row][board_col]
+        board.is_won = True
+        board.winner = winner
+        previous = self.won_boards[board_row][board_col]
+        if previous is not None:
+            self._won_boards_key ^= WON_BOARD_KEYS[board_row * 8 + board_col][COLOR_CODES[previous]]
+        self.won_boards[board_row][board_col] = winner
+        self._won_boards_key ^= WON_BOARD_KEYS[board_row * 8 + board_col][COLOR_CODES[winner]]
+        
+        if self._check_ultimate_win(board_row, board_col, winner):
+            self.game_over = True
+            self.winner = winner
+            return True
+        return False
     
     def get_current_board(self) -> ChessBoard:
         """Get the currently active board"""
@@ -51,21 +165,21 @@ class UltimateChessBoard:
             return False
         
         # Try to make the move
+        old_key = current_board.zobrist_key
         if not current_board.move_piece(from_row, from_col, to_row, to_col):
             return False
         
         # Record the move with both source and destination so UI can animate exactly
         board_row, board_col = self.current_board
+        self._update_board_key(board_row, board_col, old_key)
+        self._update_tensor(board_row, board_col, from_row, from_col, to_row, to_col)
         self.move_history.append((board_row, board_col, from_row, from_col, to_row, to_col))
         self.moves_on_current_board += 1
         
         # Check if this board is now won
-        if current_board.is_won:
-            self.won_boards[board_row][board_col] = current_board.winner
-            # Check if this creates a win in the ultimate board (only if winner is set)
-            if current_board.winner is not None and self._check_ultimate_win(board_row, board_col, current_board.winner):
-                self.game_over = True
-                self.winner = current_board.winner
+        if current_board.is_won and current_board.winner is not None:
+            # Check if this creates a win in the ultimate board
+            if self.mark_board_won(board_row, board_col, current_board.winner):
                 return True
         
         # Determine next board based on dual-move system
@@ -82,8 +196,61 @@ class UltimateChessBoard:
         
         return True
     
-    def _determine_next_board(self, piece_row: int, piece_col: int):
-        """Determine which board to play on next based on the piece position"""
+    def push_move(self, from_row: int, from_col: int, to_row: int, to_col: int):
+        """
+        Play a legal move on the current board for search, to be taken back
+        with pop_move. Follows the same rules as make_move, except that the
+        move is not validated or recorded in move_history, and a won target
+        board always sends play to the first free board.
+        """
+        board_row, board_col = self.current_board
+        current_board = self.boards[board_row][board_col]
+        old_key = current_board.zobrist_key
+        self._search_undo.append(GameUndoToken(
+            current_board.make_move((from_row, from_col, to_row, to_col)),
+            self.current_board, self.current_player, self.moves_on_current_board,
+            self.game_over, self.winner, self.won_boards[board_row][board_col], self._won_boards_key,
+        ))
+        self._update_board_key(board_row, board_col, old_key)
+        self._update_tensor(board_row, board_col, from_row, from_col, to_row, to_col)
+        self.moves_on_current_board += 1
+        
+        if current_board.is_won and current_board.winner is not None:
+            if self.mark_board_won(board_row, board_col, current_board.winner):
+                return
+        
+        if self.moves_on_current_board >= self.max_moves_per_board:
+            self._determine_next_board(to_row, to_col, deterministic=True)
+            self.moves_on_current_board = 0
+        
+        self.current_player = Color.BLACK if self.current_player == Color.WHITE else Color.WHITE
+    
+    def pop_move(self):
+        """Take back the last push_move"""
+        token = self._search_undo.pop()
+        board_row, board_col = token.board_position
+        board = self.boards[board_row][board_col]
+        moved_key = board.zobrist_key
+        board.unmake_move(token.board_undo)
+        self._update_board_key(board_row, board_col, moved_key)
+        from_row, from_col, to_row, to_col = token.board_undo.move
+        base = (board_row * 8 + board_col) * 64
+        self._tensor_cells[base + from_row * 8 + from_col] = tensor_code(token.board_undo.piece)
+        self._tensor_cells[base + to_row * 8 + to_col] = tensor_code(token.board_undo.captured)
+        self.current_board = token.board_position
+        self.current_player = token.current_player
+        self.moves_on_current_board = token.moves_on_current_board
+        self.game_over = token.game_over
+        self.winner = token.winner
+        self.won_boards[board_row][board_col] = token.won_board
+        self._won_boards_key = token.won_boards_key
+    
+    def _determine_next_board(self, piece_row: int, piece_col: int, deterministic: bool = False):
+        """
+        Determine which board to play on next based on the piece position.
+        If that board is won a random free board is picked, or the first
+        free one when deterministic is set.
+        """
         # Convert chess notation to board coordinates
         board_row = piece_row
         board_col = piece_col
@@ -98,7 +265,7 @@ class UltimateChessBoard:
                         available_boards.append((r, c))
             
             if available_boards:
-                self.current_board = random.choice(available_boards)
+                self.current_board = available_boards[0] if deterministic else random.choice(available_boards)
             else:
                 # All boards are won, game should be over
                 self.game_over = True
@@ -194,13 +361,27 @@ class UltimateChessBoard:
         return False
     
     def get_valid_moves(self) -> List[Tuple[int, int, int, int]]:
-        """Get all valid moves for the current player on the current board"""
+        """
+        Get all valid moves for the current player on the current board.
+        When the enemy king can be taken only those captures are returned:
+        they win the board, so nothing else is worth considering.
+        """
+        return list(self.legal_moves())
+    
+    def legal_moves(self) -> Tuple[Tuple[int, int, int, int], ...]:
+        """get_valid_moves without the copy: the tuple is shared with the position cache, for searches"""
         current_board = self.get_current_board()
         
         if current_board.is_won:
-            return []
-        
-        return current_board.get_valid_moves_for_color(self.current_player)
+            return ()
+        
+        key = current_board.position_key(self.current_player)
+        moves = self.position_cache.get_moves(key)
+        if moves is None:
+            moves = (tuple(current_board.king_captures(self.current_player))
+                     or tuple(current_board.generate_legal_moves(self.current_player)))
+            self.position_cache.store_moves(key, moves)
+        return moves
     
     def get_board_position(self, board_row: int, board_col: int) -> Tuple[int, int]:
         """Convert board coordinates to screen position"""
@@ -239,10 +420,11 @@ class UltimateChessBoard:
     
     def reset_game(self):
         """Reset the game to initial state"""
+        self.cancel_ai_search()
         # Reset all boards
-        for row in range(8):
-            for col in range(8):
-                self.boards[row][col] = ChessBoard()
+        self.boards = _initial_boards()
+        self.tensor = _INITIAL_TENSOR.copy()
+        self._tensor_cells = self.tensor.reshape(-1).data
         
         # Reset game state
         self.current_player = Color.WHITE
@@ -252,13 +434,66 @@ class UltimateChessBoard:
         self.won_boards = [[None for _ in range(8)] for _ in range(8)]
         self.move_history = []
         self.moves_on_current_board = 0
+        self._init_zobrist()
+        self._ponder_key = None
+        if self.ai is not None:
+            self.ai.new_game()
+    
+    def copy(self) -> 'UltimateChessBoard':
+        """
+        Snapshot of the game for a background search. Boards are
+        copy-on-write; the AI, move history and search undo stack are not
+        carried over.
+        """
+        game = UltimateChessBoard.__new__(UltimateChessBoard)
+        game.boards = [[board.copy() for board in row] for row in self.boards]
+        game.tensor = self.tensor.copy()
+        game._tensor_cells = game.tensor.reshape(-1).data
+        game.current_player = self.current_player
+        game.current_board = self.current_board
+        game.game_over = self.game_over
+        game.winner = self.winner
+        game.game_mode = self.game_mode
+        game.ai_difficulty = self.ai_difficulty
+        game.ai_time_limit = self.ai_time_limit
+        game.ai_workers = self.ai_workers
+        game.ai = None
+        game.position_cache = self.position_cache
+        game.won_boards = [row[:] for row in self.won_boards]
+        game.move_history = []
+        game.moves_on_current_board = self.moves_on_current_board
+        game.max_moves_per_board = self.max_moves_per_board
+        game._search_undo = []
+        game._ai_executor = None
+        game._ai_future = None
+        game._ai_stop = None
+        game._ai_search_key = 0
+        game.pondering_enabled = False
+        game._ponder_future = None
+        game._ponder_stop = None
+        game._ponder_key = None
+        game._boards_key = self._boards_key
+        game._won_boards_key = self._won_boards_key
+        return game
+    
+    def _ai_snapshot(self):
+        """What the AI searches: the whole game, or just a copy of the current board"""
+        return self.copy() if self.ai.searches_game else self.get_current_board().copy()
     
-    def set_game_mode(self, game_mode: str, ai_difficulty: str = "medium"):
+    def set_game_mode(self, game_mode: str, ai_difficulty: str = "medium", ai_time_limit: Optional[float] = None,
+                      ai_workers: Optional[int] = None):
         """Set the game mode and AI difficulty"""
+        self.cancel_ai_search()
+        if self.ai is not None:
+            self.ai.close()
         self.game_mode = game_mode
         self.ai_difficulty = ai_difficulty
+        if ai_time_limit is not None:
+            self.ai_time_limit = ai_time_limit
+        if ai_workers is not None:
+            self.ai_workers = ai_workers
         if game_mode == "vs_cpu":
-            self.ai = ChessAI(Color.BLACK, ai_difficulty)
+            self.ai = _create_ai(ai_difficulty, self.ai_time_limit, self.ai_workers, self.position_cache)
         else:
             self.ai = None
     
@@ -273,8 +508,33 @@ class UltimateChessBoard:
         if not self.is_ai_turn():
             return None
         
-        current_board = self.get_current_board()
-        return self.ai.get_move(current_board) if self.ai is not None else None
+        if self.ai is None:
+            return None
+        ai_move = self._cached_ai_move()
+        if ai_move is None:
+            ai_move = self.ai.get_move(self.copy() if self.ai.searches_game else self.get_current_board())
+            self._cache_ai_move(ai_move)
+        return ai_move
+    
+    def _ai_move_key(self) -> Optional[int]:
+        """Position-cache key for the AI's move here, or None if its moves are not worth keeping"""
+        # only the hard search gives the same answer every time; the ultimate AI's
+        # move depends on the whole game, not just this board
+        if self.ai is None or not self.ai.is_timed or self.ai.searches_game:
+            return None
+        return self.get_current_board().position_key(self.ai.color)
+    
+    def _cached_ai_move(self) -> Optional[Tuple[int, int, int, int]]:
+        key = self._ai_move_key()
+        if key is None:
+            return None
+        ai_move = self.position_cache.get_best_move(key)
+        return ai_move if ai_move in self.get_valid_moves() else None
+    
+    def _cache_ai_move(self, ai_move: Optional[Tuple[int, int, int, int]]):
+        key = self._ai_move_key()
+        if key is not None and ai_move is not None:
+            self.position_cache.store_best_move(key, ai_move)
     
     def make_ai_move(self) -> bool:
         """Make the AI's move"""
@@ -288,6 +548,94 @@ class UltimateChessBoard:
         from_row, from_col, to_row, to_col = ai_move
         return self.make_move(from_row, from_col, to_row, to_col)
     
+    @property
+    def ai_search_pending(self) -> bool:
+        """Whether a background search has been started and not yet finished or cancelled"""
+        return self._ai_future is not None
+    
+    def start_ai_search(self) -> bool:
+        """
+        Start the AI's search on a worker thread. The worker gets a snapshot
+        of the current board, so the game can keep being drawn while it
+        thinks. Poll ai_search_done() and apply the result with
+        finish_ai_search().
+        """
+        if not self.is_ai_turn() or self._ai_future is not None:
+            return False
+        # the ponder search yields the worker; the TT and any finished result stay with the AI
+        self.stop_ponder()
+        self._ai_stop = threading.Event()
+        self._ai_search_key = self.zobrist_key
+        ai_move = self._cached_ai_move()
+        if ai_move is not None:
+            # this board has been searched before, no need to do it again
+            self._ai_future = Future()
+            self._ai_future.set_result(ai_move)
+        else:
+            self._ai_future = self._get_ai_executor().submit(self.ai.get_move, self._ai_snapshot(), self._ai_stop)
+        return True
+    
+    def ai_search_done(self) -> bool:
+        return self._ai_future is not None and self._ai_future.done()
+    
+    def finish_ai_search(self) -> bool:
+        """
+        Play the move found by the finished background search. Returns False
+        if there was no move, or the game changed while the AI was thinking.
+        """
+        if not self.ai_search_done():
+            return False
+        future = self._ai_future
+        self._ai_future = None
+        self._ai_stop = None
+        ai_move = future.result()
+        if ai_move is None or not self.is_ai_turn() or self.zobrist_key != self._ai_search_key:
+            return False
+        
+        self._cache_ai_move(ai_move)
+        from_row, from_col, to_row, to_col = ai_move
+        return self.make_move(from_row, from_col, to_row, to_col)
+    
+    def cancel_ai_search(self):
+        """Stop the background search and any pondering, dropping the results"""
+        self.stop_ponder()
+        if self._ai_stop is not None:
+            self._ai_stop.set()
+        self._ai_future = None
+        self._ai_stop = None
+    
+    def start_ponder(self) -> bool:
+        """
+        While the human is to move against a timed AI, have the AI guess the
+        reply and search its answer to it in the background. The answer
+        comes for free if the guess is right, since the dual-move rule keeps
+        the AI on the same board; otherwise the search still warms the
+        AI's transposition table. Each position is pondered at most once.
+        """
+        if (not self.pondering_enabled or self.game_mode != "vs_cpu" or self.ai is None
+                or not self.ai.is_timed or self.game_over or self.current_player == self.ai.color):
+            return False
+        if self._ponder_future is not None or self._ai_future is not None or self._ponder_key == self.zobrist_key:
+            return False
+        if self.get_current_board().is_won:
+            return False
+        self._ponder_stop = threading.Event()
+        self._ponder_key = self.zobrist_key
+        self._ponder_future = self._get_ai_executor().submit(self.ai.ponder, self._ai_snapshot(), self._ponder_stop)
+        return True
+    
+    def stop_ponder(self):
+        if self._ponder_stop is not None:
+            self._ponder_stop.set()
+        self._ponder_future = None
+        self._ponder_stop = None
+    
+    def _get_ai_executor(self) -> ThreadPoolExecutor:
+        # a single worker, so the AI search and pondering never run at the same time
+        if self._ai_executor is None:
+            self._ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chess-ai")
+        return self._ai_executor
+    
     def get_board_coordinates_from_position(self, x: int, y: int) -> Optional[Tuple[int, int]]:
         """Convert screen position to board coordinates"""
         board_size = 80
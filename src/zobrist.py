@@ -0,0 +1,36 @@
+import random
+from typing import List
+
+# fixed seed so keys are identical across runs and processes (disk caches, worker pools)
+_rng = random.Random(0x4879706572436865)
+
+
+def _random_key() -> int:
+    return _rng.getrandbits(64)
+
+
+# PIECE_KEYS[piece_index][square], piece_index as in chess_board.PIECE_INDEX
+PIECE_KEYS: List[List[int]] = [[_random_key() for _ in range(64)] for _ in range(12)]
+# xor-ed in when black is to move
+SIDE_KEY = _random_key()
+
+# meta-board terms for UltimateChessBoard, indexed by board number (board_row * 8 + board_col)
+BOARD_SALTS: List[int] = [_random_key() for _ in range(64)]
+CURRENT_BOARD_KEYS: List[int] = [_random_key() for _ in range(64)]
+# WON_BOARD_KEYS[board_index][0 for white, 1 for black]
+WON_BOARD_KEYS: List[List[int]] = [[_random_key(), _random_key()] for _ in range(64)]
+MOVES_ON_BOARD_KEYS: List[int] = [_random_key() for _ in range(8)]
+
+MASK_64 = (1 << 64) - 1
+
+
+def mix_board_key(board_key: int, board_index: int) -> int:
+    """
+    Scramble a board's key with its position on the meta-board, so identical
+    boards on different squares don't cancel each other out when xor-ed.
+    """
+    # splitmix64 finaliser
+    z = (board_key ^ BOARD_SALTS[board_index]) & MASK_64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return z ^ (z >> 31)